@@ -7,11 +7,15 @@
 import os
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # 项目根目录
 PROJECT_ROOT = Path(__file__).parent
 
+# pylint 并行进程数，0 表示按CPU核数自动选择（CI上可设为2避免超额订阅）
+PYLINT_JOBS = os.environ.get('PYLINT_JOBS', '0')
+
 # 要检查的文件
 SRC_FILES = [
     'src/fusion.py',
@@ -33,6 +37,7 @@ def run_pylint(file_path: str) -> dict:
     cmd = [
         'pylint', file_path,
         '--output-format=text',
+        f'--jobs={PYLINT_JOBS}',
         '--disable=import-error,trailing-whitespace,wrong-import-order'
     ]
     
@@ -62,20 +67,26 @@ def main():
     total_rating = 0
     count = 0
     
+    paths = []
     for file in SRC_FILES:
         full_path = PROJECT_ROOT / file
         if not full_path.exists():
             print(f"⚠️ 跳过: {file} (不存在)")
             continue
+        paths.append((file, str(full_path)))
+    
+    # 每个文件一个 pylint 子进程，并发执行；按原顺序输出结果
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        results = executor.map(run_pylint, [full_path for _, full_path in paths])
         
-        print(f"\n检查: {file}...")
-        result = run_pylint(str(full_path))
-        
-        status = "✅" if result['rating'] >= 7 else "⚠️" if result['rating'] >= 5 else "❌"
-        print(f"  {status} 评分: {result['rating']}/10")
-        
-        total_rating += result['rating']
-        count += 1
+        for (file, _), result in zip(paths, results):
+            print(f"\n检查: {file}...")
+            
+            status = "✅" if result['rating'] >= 7 else "⚠️" if result['rating'] >= 5 else "❌"
+            print(f"  {status} 评分: {result['rating']}/10")
+            
+            total_rating += result['rating']
+            count += 1
     
     print("\n" + "=" * 60)
     if count > 0:
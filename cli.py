@@ -10,11 +10,7 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from src.config import Config
-from src.fusion import FusionEngine
-from src.advanced_tracker import TrackerFactory
-from src.system_check import run_system_check
-from src.health_check import health_checker
+# 业务模块在各子命令内部按需导入，避免 --help 等轻量命令加载 numpy 等依赖
 
 
 @click.group()
@@ -26,6 +22,8 @@ def cli():
 @cli.command()
 def check():
     """系统自检"""
+    from src.system_check import run_system_check
+
     click.echo("运行系统自检...")
     result = run_system_check()
 
@@ -45,6 +43,8 @@ def check():
 @cli.command()
 def health():
     """健康检查"""
+    from src.health_check import health_checker
+
     click.echo("运行健康检查...")
     result = health_checker.check_all()
 
@@ -60,6 +60,9 @@ def health():
 @cli.command()
 def info():
     """显示系统信息"""
+    from src.config import Config
+    from src.advanced_tracker import TrackerFactory
+
     click.echo("舟山定海渔港雷达监控系统 V2.0")
     click.echo("")
 
@@ -87,6 +90,9 @@ def info():
 @click.option('--algo', default='KF', help='跟踪算法')
 def test_tracker(algo):
     """测试跟踪算法"""
+    import numpy as np
+    from src.advanced_tracker import TrackerFactory
+
     click.echo(f"测试算法: {algo}")
 
     tracker = TrackerFactory.create(algo)
@@ -102,7 +108,6 @@ def test_tracker(algo):
         error = np.sqrt((ex - x)**2 + (ey - y)**2)
         errors.append(error)
 
-    import numpy as np
     mean_error = np.mean(errors)
 
     click.echo(f"平均误差: {mean_error:.4f}")
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+前端库本地化脚本
+下载页面引用的 CDN 脚本，gzip 压缩后保存到 src/static/vendor，
+Web 服务启动时检测到本地副本即改为从本机提供（省去外网 DNS/TLS 握手）。
+用法: python fetch_vendor.py
+"""
+
+import gzip
+import sys
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.api import VENDOR_DIR, VENDOR_SCRIPTS
+
+
+def main():
+    vendor_dir = Path(VENDOR_DIR)
+    vendor_dir.mkdir(parents=True, exist_ok=True)
+    failed = 0
+    for name, url in VENDOR_SCRIPTS.items():
+        try:
+            with urllib.request.urlopen(url, timeout=30) as resp:
+                body = resp.read()
+        except OSError as e:
+            print(f"❌ {name}: {e}")
+            failed += 1
+            continue
+        packed = gzip.compress(body, compresslevel=9)
+        (vendor_dir / f'{name}.gz').write_bytes(packed)
+        print(f"✅ {name}: {len(body) // 1024} KB -> {len(packed) // 1024} KB")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
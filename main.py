@@ -3,14 +3,43 @@
 主程序入口
 """
 
+import argparse
+import json
+
+
+def _monkey_patch():
+    """
+    配置文件中 output.websocket.async_mode 为 eventlet/gevent 时打协程补丁
+    
+    必须在导入 socket/threading 等模块之前执行，因此只预读 --config 指定的文件。
+    """
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument('--config', default=None)
+    config_path = pre.parse_known_args()[0].config
+    if not config_path:
+        return
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            async_mode = json.load(f).get('output', {}).get('websocket', {}).get('async_mode')
+    except (OSError, ValueError):
+        return
+    if async_mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif async_mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+
+
+_monkey_patch()
+
 import sys
 import os
-import argparse
 import logging
 import signal
 import time
 import threading
-from datetime import datetime
+from collections import deque
 from pathlib import Path
 
 # 添加src路径
@@ -30,6 +59,7 @@ from src.storage import TrajectoryStorage
 from src.alert import AlertManager, AlertLevel
 from src.classifier import TargetClassifier
 from src.performance_monitor import PerformanceMonitor
+from src.models import TrackedTarget
 
 
 class RadarSystem:
@@ -49,7 +79,12 @@ class RadarSystem:
         self.trajectory_manager = None
         self.cfar_detector = None
         self.clutter_filter = None
+        self.speed_filter = None
         self.storage = None
+        self.storage_flush_interval = 1.0
+        # 待写入的轨迹点 (target_id, traj_data)，由后台线程批量落盘
+        self._storage_queue = deque()
+        self._storage_lock = threading.Lock()
         self.alert_manager = None
         self.classifier = None
         self.performance_monitor = None
@@ -111,6 +146,10 @@ class RadarSystem:
             min_distance=clutter_config.get('min_distance', 0.05),
             max_distance=clutter_config.get('max_distance', 20.0)
         )
+        self.speed_filter = SpeedFilter(
+            min_speed=self.clutter_filter.min_speed,
+            max_speed=self.clutter_filter.max_speed
+        )
 
         # 轨迹存储
         storage_config = self.config.fusion_config.get('storage', {})
@@ -118,6 +157,7 @@ class RadarSystem:
             self.storage = TrajectoryStorage(
                 storage_path=storage_config.get('path', 'data/trajectories')
             )
+            self.storage_flush_interval = storage_config.get('flush_interval', 1.0)
 
         # 告警管理
         self.alert_manager = AlertManager()
@@ -132,60 +172,49 @@ class RadarSystem:
 
     def _on_target_update(self, target):
         """目标更新回调"""
-        # 转换为字典
-        if hasattr(target, '__dict__'):
-            target = target.__dict__
-        elif not isinstance(target, dict):
-            return
-
-        if not target:
+        # 一次性转换为定长记录
+        target = TrackedTarget.from_target(target)
+        if target is None:
             return
 
-        target_id = target.get('id', '')
-        lat = target.get('lat', 0)
-        lon = target.get('lon', 0)
-        speed = target.get('speed_knots', 0)
-        course = target.get('course_deg', 0)
+        target_id = target.id
+        lat = target.lat
+        lon = target.lon
+        speed = target.speed_knots
+        course = target.course_deg
 
         # Kalman滤波
         if self.kalman_filter:
-            self.kalman_filter.update_target(target_id, lat, lon)
-            kf = self.kalman_filter.filters.get(target_id)
-            if kf:
-                state = kf.get_state()
-                target['kalman_lat'] = state.get('x', lat)
-                target['kalman_lon'] = state.get('y', lon)
+            state = self.kalman_filter.update_target(target_id, lat, lon)
+            if state:
+                target.kalman_lat = state.get('x', lat)
+                target.kalman_lon = state.get('y', lon)
 
         # 轨迹记录
         if self.trajectory_manager:
             self.trajectory_manager.add_target_point(target_id, lat, lon, speed, course)
             pred = self.trajectory_manager.predict_position(target_id, seconds=30)
             if pred:
-                target['predict_lat'], target['predict_lon'] = pred
+                target.predict_lat, target.predict_lon = pred
 
         # 杂波过滤
-        if self.clutter_filter:
-            speed_filter = SpeedFilter(
-                min_speed=self.clutter_filter.min_speed,
-                max_speed=self.clutter_filter.max_speed
-            )
-            target['_clutter_passed'] = speed_filter.is_valid(speed)
+        if self.speed_filter:
+            target.clutter_passed = self.speed_filter.is_valid(speed)
 
         # 轨迹持久化
         if self.storage and target_id:
             traj_data = {
-                'timestamp': target.get('timestamp', datetime.now().isoformat()),
+                'timestamp': target.timestamp,
                 'lat': lat,
                 'lon': lon,
                 'speed_knots': speed,
                 'course_deg': course
             }
-            self.storage.save_trajectory(target_id, traj_data)
+            self._storage_queue.append((target_id, traj_data))
 
         # 目标分类
         if self.classifier:
-            class_result = self.classifier.classify_target(target)
-            target['classification'] = class_result
+            target.classification = self.classifier.classify_target(target)
 
         # 告警检测
         if self.alert_manager:
@@ -210,6 +239,11 @@ class RadarSystem:
             # 正常模式
             self._start_normal()
 
+        # 启动轨迹批量写入
+        if self.storage:
+            storage_thread = threading.Thread(target=self._run_storage_flush, daemon=True)
+            storage_thread.start()
+
         # 启动API
         if self.api:
             self.logger.info("启动API服务...")
@@ -248,6 +282,21 @@ class RadarSystem:
         while self.running:
             time.sleep(1)
 
+    def _run_storage_flush(self):
+        """定期批量写入轨迹"""
+        while self.running:
+            time.sleep(self.storage_flush_interval)
+            self._flush_storage()
+
+    def _flush_storage(self):
+        """取出队列中的全部轨迹点并批量写入"""
+        with self._storage_lock:
+            entries = []
+            while self._storage_queue:
+                entries.append(self._storage_queue.popleft())
+            if entries:
+                self.storage.save_trajectory_batch(entries)
+
     def _start_normal(self):
         """正常模式"""
         self.logger.info("正常模式")
@@ -256,6 +305,8 @@ class RadarSystem:
         """停止系统"""
         self.logger.info("收到停止信号，正在关闭...")
         self.running = False
+        if self.storage:
+            self._flush_storage()
 
     def _signal_handler(self, signum, frame):
         """信号处理"""
@@ -0,0 +1,42 @@
+"""
+跟踪算法内核AOT预编译脚本
+
+用法（在项目根目录执行）:
+    python src/_tracker_kernels_aot.py
+
+在 src/ 下生成 tracker_kernels 扩展模块，advanced_tracker 导入时优先使用，
+省去首次调用时的JIT编译等待。未生成时自动回退到JIT/NumPy实现。
+注意: AOT编译不支持 parallel=True，粒子滤波内核以单线程方式编译。
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from numba.pycc import CC
+
+from src import advanced_tracker as at
+
+
+def build():
+    if at._aot is not None:
+        print("已存在 tracker_kernels，请先删除后再重新编译")
+        return 1
+
+    cc = CC('tracker_kernels')
+    cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+    for name, signatures in at.KERNEL_SIGNATURES.items():
+        func = getattr(at, f'_{name}')
+        func = getattr(func, 'py_func', func)
+        for code, signature in signatures.items():
+            cc.export(f'{name}_{code}', signature)(func)
+
+    cc.compile()
+    print(f"已生成 tracker_kernels -> {cc.output_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(build())
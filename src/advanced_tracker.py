@@ -5,8 +5,208 @@
 # pylint: disable=duplicate-code
 """
 
+import math
+
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# AOT预编译内核（python src/_tracker_kernels_aot.py 生成），存在时无需JIT
+try:
+    from src import tracker_kernels as _aot
+except ImportError:
+    _aot = None
+
+# 常用单位阵（只读，使用时通过乘法或 copy() 产生新数组）
+_I4 = np.eye(4)
+_I2 = np.eye(2)
+_I4.setflags(write=False)
+_I2.setflags(write=False)
+
+
+# 内核签名（JIT与AOT共用），按数组精度区分
+KERNEL_SIGNATURES = {
+    'kf_step': {
+        'f8': 'void(f8[:], f8[:, :], f8, f8[:, :], f8[:, :], f8, f8)',
+        'f4': 'void(f4[:], f4[:, :], f8, f4[:, :], f4[:, :], f8, f8)',
+    },
+    'pf_step': {
+        'f8': 'void(f8[:, :], f8[:], f8[:], f8[:, :], f8, f8, f8, f8)',
+        'f4': 'void(f4[:, :], f4[:], f4[:], f4[:, :], f8, f8, f8, f8)',
+    },
+    'systematic_resample': {
+        'f8': 'void(f8[:], f8, i8[:])',
+        'f4': 'void(f4[:], f8, i8[:])',
+    },
+}
+_DTYPE_CODES = {np.dtype(np.float64): 'f8', np.dtype(np.float32): 'f4'}
+
+
+def _jit(name, **options):
+    """
+    numba.njit 的可选封装
+
+    未安装 numba 或已有AOT内核时原样返回函数，不做JIT编译。
+    """
+    if njit is None or _aot is not None:
+        return lambda func: func
+    return njit(list(KERNEL_SIGNATURES[name].values()),
+                cache=True, fastmath=True, **options)
+
+
+def _kernel(name, dtype):
+    """按 dtype 选择内核：优先AOT预编译版本，否则使用本模块的JIT/NumPy版本"""
+    code = _DTYPE_CODES.get(np.dtype(dtype))
+    if _aot is not None and code is not None:
+        return getattr(_aot, f'{name}_{code}')
+    return globals()[f'_{name}']
+
+
+@_jit('kf_step')
+def _kf_step(x, P, dt, Q, R, zx, zy):
+    """
+    恒速模型KF单步预测+更新（闭式标量展开，原地更新 x/P）
+
+    F 只有 dt 两个非对角元，H 取前两维，因此 F P F^T、S、K 都可以
+    直接用标量写出，无需矩阵乘法和求逆。Q/R 均视为对称矩阵。
+    """
+    # 预测: x = F x
+    x0 = x[0] + dt * x[2]
+    x1 = x[1] + dt * x[3]
+    x2 = x[2]
+    x3 = x[3]
+
+    # 预测: P = F P F^T + Q（对称，只算上三角10项）
+    p00, p01, p02, p03 = P[0, 0], P[0, 1], P[0, 2], P[0, 3]
+    p11, p12, p13 = P[1, 1], P[1, 2], P[1, 3]
+    p22, p23, p33 = P[2, 2], P[2, 3], P[3, 3]
+    dt2 = dt * dt
+
+    n00 = p00 + 2.0 * dt * p02 + dt2 * p22 + Q[0, 0]
+    n01 = p01 + dt * (p03 + p12) + dt2 * p23 + Q[0, 1]
+    n02 = p02 + dt * p22 + Q[0, 2]
+    n03 = p03 + dt * p23 + Q[0, 3]
+    n11 = p11 + 2.0 * dt * p13 + dt2 * p33 + Q[1, 1]
+    n12 = p12 + dt * p23 + Q[1, 2]
+    n13 = p13 + dt * p33 + Q[1, 3]
+    n22 = p22 + Q[2, 2]
+    n23 = p23 + Q[2, 3]
+    n33 = p33 + Q[3, 3]
+
+    # 残差 y = z - H x，残差协方差 S = P[:2, :2] + R，闭式求逆
+    y0 = zx - x0
+    y1 = zy - x1
+    s00 = n00 + R[0, 0]
+    s01 = n01 + R[0, 1]
+    s11 = n11 + R[1, 1]
+    inv_det = 1.0 / (s00 * s11 - s01 * s01)
+    i00 = s11 * inv_det
+    i01 = -s01 * inv_det
+    i11 = s00 * inv_det
+
+    # K = P[:, :2] S^-1
+    k00 = n00 * i00 + n01 * i01
+    k01 = n00 * i01 + n01 * i11
+    k10 = n01 * i00 + n11 * i01
+    k11 = n01 * i01 + n11 * i11
+    k20 = n02 * i00 + n12 * i01
+    k21 = n02 * i01 + n12 * i11
+    k30 = n03 * i00 + n13 * i01
+    k31 = n03 * i01 + n13 * i11
+
+    # x = x + K y
+    x[0] = x0 + k00 * y0 + k01 * y1
+    x[1] = x1 + k10 * y0 + k11 * y1
+    x[2] = x2 + k20 * y0 + k21 * y1
+    x[3] = x3 + k30 * y0 + k31 * y1
+
+    # P = (I - K H) P = P - K P[:2, :]
+    P[0, 0] = n00 - k00 * n00 - k01 * n01
+    P[0, 1] = P[1, 0] = n01 - k00 * n01 - k01 * n11
+    P[0, 2] = P[2, 0] = n02 - k00 * n02 - k01 * n12
+    P[0, 3] = P[3, 0] = n03 - k00 * n03 - k01 * n13
+    P[1, 1] = n11 - k10 * n01 - k11 * n11
+    P[1, 2] = P[2, 1] = n12 - k10 * n02 - k11 * n12
+    P[1, 3] = P[3, 1] = n13 - k10 * n03 - k11 * n13
+    P[2, 2] = n22 - k20 * n02 - k21 * n12
+    P[2, 3] = P[3, 2] = n23 - k20 * n03 - k21 * n13
+    P[3, 3] = n33 - k30 * n03 - k31 * n13
+
+
+if njit is not None:
+    from numba import prange
+
+    @_jit('pf_step', parallel=True)
+    def _pf_step(particles, weights, state, noise, x, y, dt, neg_inv_2r2):
+        """PF单步预测+加权+归一化+状态估计（numba并行，单次遍历粒子）"""
+        n = particles.shape[0]
+
+        total = 0.0
+        for i in prange(n):
+            px = particles[i, 0] + particles[i, 2] * dt + noise[i, 0]
+            py = particles[i, 1] + particles[i, 3] * dt + noise[i, 1]
+            particles[i, 0] = px
+            particles[i, 1] = py
+            dx = px - x
+            dy = py - y
+            w = weights[i] * np.exp((dx * dx + dy * dy) * neg_inv_2r2)
+            weights[i] = w
+            total += w
+
+        inv_total = 1.0 / total
+        sx = 0.0
+        sy = 0.0
+        svx = 0.0
+        svy = 0.0
+        for i in prange(n):
+            w = weights[i] * inv_total
+            weights[i] = w
+            sx += w * particles[i, 0]
+            sy += w * particles[i, 1]
+            svx += w * particles[i, 2]
+            svy += w * particles[i, 3]
+
+        state[0] = sx
+        state[1] = sy
+        state[2] = svx
+        state[3] = svy
+
+    @_jit('systematic_resample')
+    def _systematic_resample(weights, u0, indices):
+        """系统重采样：一次均匀抽样 u0 + 单次线性扫描CDF，O(N)"""
+        n = weights.shape[0]
+        cumsum = weights[0]
+        j = 0
+        for i in range(n):
+            position = (i + u0) / n
+            while position > cumsum and j < n - 1:
+                j += 1
+                cumsum += weights[j]
+            indices[i] = j
+else:
+    def _pf_step(particles, weights, state, noise, x, y, dt, neg_inv_2r2):
+        """PF单步预测+加权+归一化+状态估计（NumPy实现）"""
+        particles[:, 0] += particles[:, 2] * dt + noise[:, 0]
+        particles[:, 1] += particles[:, 3] * dt + noise[:, 1]
+
+        dx = particles[:, 0] - x
+        dy = particles[:, 1] - y
+        weights *= np.exp((dx * dx + dy * dy) * neg_inv_2r2)
+        weights /= np.sum(weights)
+
+        state[:] = weights @ particles
+
+    def _systematic_resample(weights, u0, indices):
+        """系统重采样（NumPy实现，在CDF上二分查找）"""
+        n = weights.shape[0]
+        positions = (np.arange(n) + u0) / n
+        cumsum = np.cumsum(weights)
+        cumsum[-1] = 1.0  # 避免舍入误差导致越界
+        indices[:] = np.searchsorted(cumsum, positions)
+
 
 class BaseTracker:
     """基础跟踪器"""
@@ -16,135 +216,136 @@ class BaseTracker:
 
 
 class KFTracker(BaseTracker):
-    """卡尔曼滤波 - 线性最优估计"""
+    """
+    卡尔曼滤波 - 线性最优估计
 
-    def __init__(self, dt=1.0, q=0.1, r=1.0):
+    dtype 可选 np.float32 以减半内存带宽；输入为经纬度时 float32
+    只有约1米的分辨率，因此默认仍为 np.float64。
+    """
+
+    def __init__(self, dt=1.0, q=0.1, r=1.0, dtype=np.float64):
         self.dt = dt
+        self.dtype = np.dtype(dtype)
         # 状态转移矩阵 F
         self.F = np.array([
             [1, 0, dt, 0],
             [0, 1, 0, dt],
             [0, 0, 1, 0],
             [0, 0, 0, 1]
-        ])
+        ], dtype=self.dtype)
         # 测量矩阵 H
-        self.H = np.array([[1, 0, 0, 0], [0, 1, 0, 0]])
+        self.H = np.array([[1, 0, 0, 0], [0, 1, 0, 0]], dtype=self.dtype)
         # 过程噪声 Q
-        self.Q = np.eye(4) * q
+        self.Q = (_I4 * q).astype(self.dtype)
         # 测量噪声 R
-        self.R = np.eye(2) * r
+        self.R = (_I2 * r).astype(self.dtype)
 
-        self.x = np.zeros((4, 1))  # 状态 [x, y, vx, vy]
-        self.P = np.eye(4) * 100  # 协方差
+        self.x = np.zeros(4, dtype=self.dtype)  # 状态 [x, y, vx, vy]
+        self.P = (_I4 * 100).astype(self.dtype)  # 协方差
         self.init = False
 
+        self._kf_step = _kernel('kf_step', self.dtype)
+
     def process(self, x, y):
         if not self.init:
-            self.x = np.array([[x], [y], [0], [0]])
-            self.P = np.eye(4)
+            self.x = np.array([x, y, 0, 0], dtype=self.dtype)
+            self.P = _I4.astype(self.dtype)
             self.init = True
             return x, y
 
-        # 预测
-        self.x = self.F @ self.x
-        self.P = self.F @ self.P @ self.F.T + self.Q
+        # 预测+更新（原地修改 self.x / self.P）
+        self._kf_step(self.x, self.P, float(self.dt), self.Q, self.R,
+                      float(x), float(y))
 
-        # 更新
-        z = np.array([[x], [y]])
-        y_res = z - self.H @ self.x
-        S = self.H @ self.P @ self.H.T + self.R
-        K = self.P @ self.H.T @ np.linalg.inv(S)
-
-        self.x = self.x + K @ y_res
-        self.P = (np.eye(4) - K @ self.H) @ self.P
-
-        return float(self.x[0, 0]), float(self.x[1, 0])
+        return self.x[0], self.x[1]
 
     def get_state(self):
+        x, y, vx, vy = self.x.tolist()
         return {
-            'x': float(self.x[0, 0]),
-            'y': float(self.x[1, 0]),
-            'vx': float(self.x[2, 0]),
-            'vy': float(self.x[3, 0]),
-            'speed': float(np.sqrt(self.x[2, 0]**2 + self.x[3, 0]**2))
+            'x': x,
+            'y': y,
+            'vx': vx,
+            'vy': vy,
+            'speed': math.hypot(vx, vy)
         }
 
 
-class EKFTracker(KFTracker):
-    """扩展卡尔曼滤波 - 适用于非线性系统"""
-    # 继承KF，使用相同接口
-
-
-class UKFTracker(KFTracker):
-    """无迹卡尔曼滤波 - 精度更高"""
-    # 继承KF，使用相同接口
+# 恒速模型和位置测量都是线性的，此时 EKF/UKF 与 KF 结果完全一致，
+# 保留名称仅为兼容旧代码
+EKFTracker = KFTracker
+UKFTracker = KFTracker
 
 
 class PFTracker(BaseTracker):
-    """粒子滤波 - 精度最高，适用于非线性非高斯"""
+    """
+    粒子滤波 - 精度最高，适用于非线性非高斯
+
+    dtype 可选 np.float32；权重在 float32 下更早下溢为0，默认仍为 np.float64。
+    """
 
-    def __init__(self, num_particles=500, q=1.0, r=5.0):
+    def __init__(self, num_particles=500, q=1.0, r=5.0, dtype=np.float64, seed=None):
         self.num_particles = num_particles
+        self.dtype = np.dtype(dtype)
+        # 每个跟踪器独立的随机数生成器，避免全局RNG锁竞争
+        self._rng = np.random.default_rng(seed)
         self.Q = q
         self.R = r
+        self.dt = 1.0
+        # 似然指数系数 -1/(2R^2)、重采样有效粒子数阈值
+        self._inv_2R2 = -1.0 / (2.0 * r * r)
+        self._half_N = num_particles / 2.0
 
         # 粒子: [x, y, vx, vy]
         self.particles = None
         self.weights = None
-        self.state = np.zeros(4)
+        self.state = np.zeros(4, dtype=self.dtype)
         self.init = False
 
+        # 重采样索引缓冲区、过程噪声缓冲区
+        self._resample_idx = np.empty(num_particles, dtype=np.int64)
+        self._noise_buf = np.empty((num_particles, 2), dtype=self.dtype)
+
+        self._pf_step = _kernel('pf_step', self.dtype)
+        self._systematic_resample = _kernel('systematic_resample', self.dtype)
+
     def process(self, x, y):
         if not self.init:
             # 初始化粒子
-            self.particles = np.zeros((self.num_particles, 4))
-            self.particles[:, 0] = np.random.normal(x, 1, self.num_particles)
-            self.particles[:, 1] = np.random.normal(y, 1, self.num_particles)
-            self.particles[:, 2] = np.random.normal(0, 0.5, self.num_particles)
-            self.particles[:, 3] = np.random.normal(0, 0.5, self.num_particles)
-            self.weights = np.ones(self.num_particles) / self.num_particles
-            self.state = np.array([x, y, 0, 0])
+            self.particles = np.zeros((self.num_particles, 4), dtype=self.dtype)
+            self.particles[:, 0] = self._rng.normal(x, 1, self.num_particles)
+            self.particles[:, 1] = self._rng.normal(y, 1, self.num_particles)
+            self.particles[:, 2] = self._rng.normal(0, 0.5, self.num_particles)
+            self.particles[:, 3] = self._rng.normal(0, 0.5, self.num_particles)
+            self.weights = np.full(self.num_particles, 1.0 / self.num_particles,
+                                   dtype=self.dtype)
+            self.state = np.array([x, y, 0, 0], dtype=self.dtype)
             self.init = True
             return x, y
 
-        # 预测：添加过程噪声
-        dt = 1.0
-        self.particles[:, 0] += self.particles[:, 2] * dt + \
-            np.random.normal(0, self.Q, self.num_particles)
-        self.particles[:, 1] += self.particles[:, 3] * dt + \
-            np.random.normal(0, self.Q, self.num_particles)
-
-        # 计算权重（似然）
-        dx = self.particles[:, 0] - x
-        dy = self.particles[:, 1] - y
-        likelihood = np.exp(-(dx**2 + dy**2) / (2 * self.R**2))
-        self.weights *= likelihood
-        self.weights /= np.sum(self.weights)  # 归一化
-
-        # 状态估计
-        self.state[0] = np.sum(self.weights * self.particles[:, 0])
-        self.state[1] = np.sum(self.weights * self.particles[:, 1])
-        self.state[2] = np.sum(self.weights * self.particles[:, 2])
-        self.state[3] = np.sum(self.weights * self.particles[:, 3])
+        # 过程噪声
+        self._rng.standard_normal(out=self._noise_buf, dtype=self.dtype)
+        self._noise_buf *= self.Q
+
+        # 预测+似然加权+归一化+状态估计（原地修改粒子/权重/状态）
+        self._pf_step(self.particles, self.weights, self.state, self._noise_buf,
+                      float(x), float(y), self.dt, self._inv_2R2)
 
         # 重采样（避免退化）
-        if 1 / np.sum(self.weights**2) < self.num_particles / 2:
-            indices = np.random.choice(
-                self.num_particles,
-                self.num_particles,
-                p=self.weights)
-            self.particles = self.particles[indices]
-            self.weights = np.ones(self.num_particles) / self.num_particles
+        if 1.0 / np.dot(self.weights, self.weights) < self._half_N:
+            self._systematic_resample(self.weights, self._rng.random(), self._resample_idx)
+            self.particles = self.particles[self._resample_idx]
+            self.weights.fill(1.0 / self.num_particles)
 
         return self.state[0], self.state[1]
 
     def get_state(self):
+        x, y, vx, vy = self.state.tolist()
         return {
-            'x': float(self.state[0]),
-            'y': float(self.state[1]),
-            'vx': float(self.state[2]),
-            'vy': float(self.state[3]),
-            'speed': float(np.sqrt(self.state[2]**2 + self.state[3]**2))
+            'x': x,
+            'y': y,
+            'vx': vx,
+            'vy': vy,
+            'speed': math.hypot(vx, vy)
         }
 
 
@@ -153,8 +354,8 @@ class TrackerFactory:
 
     ALGORITHMS = {
         'KF': KFTracker,
-        'EKF': EKFTracker,
-        'UKF': UKFTracker,
+        'EKF': KFTracker,
+        'UKF': KFTracker,
         'PF': PFTracker
     }
 
@@ -178,8 +379,8 @@ class TrackerFactory:
         """获取算法信息"""
         info = {
             'KF': {'name': '卡尔曼滤波', 'desc': '线性最优估计', 'complexity': '低', 'accuracy': '高'},
-            'EKF': {'name': '扩展卡尔曼滤波', 'desc': '适用于非线性', 'complexity': '中', 'accuracy': '高'},
-            'UKF': {'name': '无迹卡尔曼滤波', 'desc': '精度高', 'complexity': '中高', 'accuracy': '更高'},
+            'EKF': {'name': '扩展卡尔曼滤波', 'desc': '线性模型下等同于KF', 'complexity': '低', 'accuracy': '高'},
+            'UKF': {'name': '无迹卡尔曼滤波', 'desc': '线性模型下等同于KF', 'complexity': '低', 'accuracy': '高'},
             'PF': {'name': '粒子滤波', 'desc': '精度最高,适用于复杂场景', 'complexity': '高', 'accuracy': '最高'}
         }
         return info.get(algorithm, {})
@@ -196,31 +397,28 @@ class AlgorithmTester:
         tracker = TrackerFactory.create(algorithm)
 
         # 模拟目标运动（直线）
-        true_x, true_y = 0, 0
         vx, vy = 2, 1  # 速度
+        steps = np.arange(1, num_steps + 1, dtype=np.float64)
+        true_xs = vx * steps
+        true_ys = vy * steps
 
-        errors = []
-
-        for i in range(num_steps):
-            true_x += vx
-            true_y += vy
-
-            # 添加测量噪声
-            measure_x = true_x + np.random.randn() * noise_level
-            measure_y = true_y + np.random.randn() * noise_level
+        # 添加测量噪声
+        noise = noise_level * np.random.randn(num_steps, 2)
+        measures = np.column_stack([true_xs, true_ys]) + noise
 
-            # 跟踪
-            est_x, est_y = tracker.process(measure_x, measure_y)
+        # 跟踪（有状态，逐步处理）
+        estimates = np.empty((num_steps, 2))
+        for i, (measure_x, measure_y) in enumerate(measures.tolist()):
+            estimates[i] = tracker.process(measure_x, measure_y)
 
-            # 计算误差
-            error = np.sqrt((est_x - true_x)**2 + (est_y - true_y)**2)
-            errors.append(error)
+        # 计算误差
+        errors = np.hypot(estimates[:, 0] - true_xs, estimates[:, 1] - true_ys)
 
         self.results[algorithm] = {
-            'mean_error': np.mean(errors),
-            'std_error': np.std(errors),
-            'max_error': np.max(errors),
-            'min_error': np.min(errors)
+            'mean_error': errors.mean(),
+            'std_error': errors.std(),
+            'max_error': errors.max(),
+            'min_error': errors.min()
         }
 
         return self.results[algorithm]
@@ -3,8 +3,13 @@ AIS 数据接入模块 V2.1
 使用 pyais 库进行正确解析
 """
 
+import ctypes
+import os
+import re
+import select
 import socket
 import serial
+import sys
 import threading
 import time
 import logging
@@ -17,10 +22,113 @@ try:
 except ImportError:
     print("警告: pynmea2 或 pyais 未安装")
 
+try:
+    from pyais.queue import NMEAQueue
+except ImportError:
+    NMEAQueue = None  # pyais 未安装或版本过低，逐行解码
+
 from src.models import AISTarget
 from src.config import Config
 
 
+# 需要解析的AIS语句前缀（其余如GPS的 $GPGGA 等直接丢弃）
+_AIS_PREFIXES = (b'!AIVDM', b'!AIVDO', b'!BSVDM')
+# 完整（已收到换行）的AIS语句，一次扫描整个缓冲区完成分帧和前缀过滤
+_AIS_SENTENCE_RE = re.compile(
+    rb'(?:' + b'|'.join(map(re.escape, _AIS_PREFIXES)) + rb')[^\r\n]*(?=\r?\n)')
+# 需要解码的消息类型：位置报告(1/2/3/18/19)、静态数据(5/24)，基站/航标等其余类型不解码
+_INTERESTING_TYPES = frozenset({1, 2, 3, 5, 18, 19, 24})
+# 位置报告字段，顺序对应 AISTarget 的 lat/lon/speed_knots/course_deg/heading_deg
+_AIS_FIELDS = ('lat', 'lon', 'speed', 'course', 'heading')
+
+
+def _skip_sentence(line: bytes) -> bool:
+    """由单段消息载荷首字符（6bit编码）取消息类型，不关心的类型在 pyais 解码前丢弃"""
+    fields = line.split(b',', 6)
+    if len(fields) < 7 or fields[1] != b'1' or not fields[5]:
+        # 格式异常交给 pyais；多段消息须整条入队，只丢首段会让后续分段滞留在
+        # (序列号, 信道) 槽位，拼进下一条同槽位消息
+        return False
+    msg_type = fields[5][0] - 48
+    if msg_type > 40:
+        msg_type -= 8
+    return msg_type not in _INTERESTING_TYPES
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_name', ctypes.c_void_p),
+        ('msg_namelen', ctypes.c_uint32),
+        ('msg_iov', ctypes.POINTER(_IOVec)),
+        ('msg_iovlen', ctypes.c_size_t),
+        ('msg_control', ctypes.c_void_p),
+        ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags', ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _MsgHdr), ('msg_len', ctypes.c_uint)]
+
+
+# UDP最大载荷：网关的多语句NMEA数据报可能超过2KB，按最大值接收避免截断
+_UDP_MAX_DATAGRAM = 65535
+
+# recvmmsg 仅Linux可用，其他平台回退到 recvfrom
+_recvmmsg = None
+if sys.platform.startswith('linux'):
+    try:
+        _recvmmsg = ctypes.CDLL(None, use_errno=True).recvmmsg
+        _recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint,
+                              ctypes.c_int, ctypes.c_void_p]
+        _recvmmsg.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        _recvmmsg = None
+
+
+class _UDPBatchReceiver:
+    """UDP批量接收器，一次 recvmmsg 系统调用读取多个数据报"""
+
+    MSG_WAITFORONE = 0x10000  # 阻塞等待首个数据报，其余有多少取多少
+    MSG_TRUNC = 0x20  # 数据报超出缓冲区被截断
+
+    def __init__(self, sock: socket.socket, logger: logging.Logger,
+                 batch: int = 64, size: int = _UDP_MAX_DATAGRAM):
+        self.fd = sock.fileno()
+        self.logger = logger
+        self.batch = batch
+        # 预分配接收缓冲区，循环复用
+        self.buffers = [bytearray(size) for _ in range(batch)]
+        self._c_buffers = [ctypes.c_char.from_buffer(buf) for buf in self.buffers]
+        self._iov = (_IOVec * batch)()
+        self._msgs = (_MMsgHdr * batch)()
+        for i, c_buf in enumerate(self._c_buffers):
+            self._iov[i].iov_base = ctypes.addressof(c_buf)
+            self._iov[i].iov_len = size
+            self._msgs[i].msg_hdr.msg_iov = ctypes.pointer(self._iov[i])
+            self._msgs[i].msg_hdr.msg_iovlen = 1
+
+    def recv(self) -> bytes:
+        """阻塞直到收到数据，返回本批次所有数据报拼接后的字节串"""
+        n = _recvmmsg(self.fd, self._msgs, self.batch, self.MSG_WAITFORONE, None)
+        if n < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        chunks = []
+        for i in range(n):
+            hdr = self._msgs[i].msg_hdr
+            if hdr.msg_flags & self.MSG_TRUNC:
+                # 截断的数据报末尾语句不完整，整个丢弃
+                self.logger.warning(f"AIS数据报超出接收缓冲区，已丢弃 ({self._msgs[i].msg_len}字节)")
+                continue
+            chunks.append(self.buffers[i][:self._msgs[i].msg_len])
+        return b''.join(chunks)
+
+
 class AISConnection:
     """AIS连接管理器"""
     
@@ -33,6 +141,10 @@ class AISConnection:
         self.running = False
         self.thread = None
         self.callback = None
+        self._batch_receiver = None
+        # 流式解码队列（支持多段消息重组），静态数据缓存 {mmsi: {...}}
+        self._nmea_queue = NMEAQueue() if NMEAQueue is not None else None
+        self._static = {}
     
     def set_callback(self, callback: Callable):
         self.callback = callback
@@ -50,7 +162,17 @@ class AISConnection:
         self.logger.info(f"AIS网络: {ip}:{port}")
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            # 加大接收缓冲区，防止AIS突发时内核丢包
+            # 实际上限受 net.core.rmem_max 限制，需同步调大（如 sysctl -w net.core.rmem_max=12582912）
+            rcvbuf = config.get('recv_buffer', 12 * 1024 * 1024)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+            granted = self.socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+            self.logger.info(f"AIS接收缓冲区: 请求 {rcvbuf} 字节, 实际 {granted} 字节")
             self.socket.bind((ip, port))
+            if _recvmmsg is not None:
+                self._batch_receiver = _UDPBatchReceiver(self.socket, self.logger)
+            else:
+                self.socket.setblocking(False)  # 由 _recv_burst 用 select 等待
             self.connected = True
             return True
         except Exception as e:
@@ -82,12 +204,44 @@ class AISConnection:
         if self.socket: self.socket.close()
         if self.serial: self.serial.close()
     
+    def _tune_receive_thread(self):
+        """
+        按配置绑定接收线程CPU、提高调度优先级，减少突发时的调度延迟
+        
+        cpu_affinity: CPU编号，None 不绑定；realtime_priority: Linux SCHED_FIFO 优先级，0 不启用
+        （需 root 或 CAP_SYS_NICE），Windows 下非0即设为 THREAD_PRIORITY_HIGHEST
+        """
+        cpu = self.config.get('cpu_affinity')
+        priority = self.config.get('realtime_priority', 0)
+        try:
+            if sys.platform.startswith('linux'):
+                tid = threading.get_native_id()
+                if cpu is not None:
+                    os.sched_setaffinity(tid, {cpu})
+                if priority:
+                    os.sched_setscheduler(tid, os.SCHED_FIFO, os.sched_param(priority))
+            elif sys.platform == 'win32':
+                kernel32 = ctypes.windll.kernel32
+                handle = kernel32.GetCurrentThread()
+                if cpu is not None:
+                    kernel32.SetThreadAffinityMask(handle, 1 << cpu)
+                if priority:
+                    kernel32.SetThreadPriority(handle, 2)  # THREAD_PRIORITY_HIGHEST
+        except OSError as e:
+            self.logger.warning(f"AIS接收线程调度设置失败: {e}")
+    
     def _receive_loop(self):
-        buffer = b''
+        self._tune_receive_thread()
+        buffer = bytearray()
+        # 回调与日志级别在启动时取一次；无回调时只收不解析
+        callback = self.callback
+        debug = self.logger.isEnabledFor(logging.DEBUG)
         while self.running:
             try:
-                if self.socket:
-                    data, _ = self.socket.recvfrom(4096)
+                if self._batch_receiver:
+                    data = self._batch_receiver.recv()
+                elif self.socket:
+                    data = self._recv_burst()
                 elif self.serial:
                     if self.serial.in_waiting:
                         data = self.serial.read(self.serial.in_waiting)
@@ -96,51 +250,98 @@ class AISConnection:
                         continue
                 else:
                     break
-                if data:
-                    buffer += data
-                    while b'\n' in buffer:
-                        line, buffer = buffer.split(b'\n', 1)
-                        line = line.strip().decode('utf-8', errors='ignore')
-                        if line:
-                            self._process_line(line)
+                if data and callback is not None:
+                    buffer.extend(data)
+                    # 先从缓冲区切下全部完整行（含非AIS语句）再分发，保留末尾未收完的半行；
+                    # 处理中途出错时已切下的行不会在下次读取时被重复解析
+                    end = buffer.rfind(b'\n')
+                    if end < 0:
+                        continue
+                    lines = bytes(buffer[:end + 1])
+                    del buffer[:end + 1]
+                    for match in _AIS_SENTENCE_RE.finditer(lines):
+                        try:
+                            self._process_line(match.group(), callback, debug)
+                        except Exception as e:
+                            self.logger.error(f"AIS语句处理错误: {e}")
             except Exception as e:
                 self.logger.error(f"AIS错误: {e}")
                 time.sleep(1)
     
-    def _process_line(self, line: str):
-        if 'AIVDM' in line or '!AIV' in line:
+    def _recv_burst(self, max_packets: int = 32) -> bytes:
+        """阻塞等待首个数据报，再以非阻塞方式一次取走积压的数据报"""
+        select.select([self.socket], [], [])
+        chunks = []
+        for _ in range(max_packets):
+            try:
+                data, _ = self.socket.recvfrom(_UDP_MAX_DATAGRAM)
+            except BlockingIOError:
+                break
+            chunks.append(data)
+        return b''.join(chunks)
+    
+    def _process_line(self, line: bytes, callback: Callable, debug: bool = False):
+        if _skip_sentence(line):
+            return
+        if self._nmea_queue is None:
             target = self._parse_ais(line)
-            if target and self.callback:
-                self.callback(target)
-                self.logger.debug(f"AIS: {target.mmsi} {target.name}")
+            if target:
+                callback(target)
+                if debug:
+                    self.logger.debug("AIS: %s %s", target.mmsi, target.name)
+            return
+        
+        # 流式解码：多段消息（类型5/24）在队列内重组后才出队
+        self._nmea_queue.put_line(line)
+        while (sentence := self._nmea_queue.get_or_none()) is not None:
+            if sentence.ais_id not in _INTERESTING_TYPES:
+                continue  # 重组后的多段消息在此按类型过滤
+            try:
+                target = self._parse_message(sentence.decode())
+            except Exception as e:
+                self.logger.debug("AIS解析跳过: %s", e)
+                continue
+            if target:
+                callback(target)
+                if debug:
+                    self.logger.debug("AIS: %s %s", target.mmsi, target.name)
     
-    def _parse_ais(self, line: str) -> Optional[AISTarget]:
-        """使用 pyais 解析 AIS 消息"""
+    def _parse_ais(self, line: bytes) -> Optional[AISTarget]:
+        """使用 pyais 解析单条 AIS 消息"""
         try:
-            msg = pyais.decode(line)
-            
-            # 提取字段
-            mmsi = str(msg.mmsi)
-            lat = getattr(msg, 'lat', 0) or 0
-            lon = getattr(msg, 'lon', 0) or 0
-            speed = getattr(msg, 'speed', 0) or 0
-            course = getattr(msg, 'course', 0) or 0
-            heading = getattr(msg, 'heading', 0) or 0
-            if heading == 511:  # 无效值
-                heading = 0
-            
-            return AISTarget(
-                mmsi=mmsi,
-                name=f"船{mmsi[-6:]}",
-                lat=lat,
-                lon=lon,
-                speed_knots=speed,
-                course_deg=course,
-                heading_deg=heading
-            )
+            return self._parse_message(pyais.decode(line))
         except Exception as e:
-            self.logger.debug(f"AIS解析跳过: {e}")
+            self.logger.debug("AIS解析跳过: %s", e)
             return None
+    
+    def _parse_message(self, msg) -> Optional[AISTarget]:
+        """从 pyais 解码结果构建目标，静态数据消息只更新缓存"""
+        mmsi = str(msg.mmsi)
+        if getattr(msg, 'lat', None) is None:
+            self._update_static(mmsi, msg)
+            return None
+        
+        # 提取字段（位置报告字段一次取出，位置参数构造目标）
+        lat, lon, speed, course, heading = [getattr(msg, f, 0) or 0 for f in _AIS_FIELDS]
+        if heading == 511:  # 无效值
+            heading = 0
+        
+        static = self._static.get(mmsi)
+        if static is None:
+            return AISTarget(mmsi, f"船{mmsi[-6:]}", lat, lon, speed, course, heading)
+        return AISTarget(mmsi, static.get('name') or f"船{mmsi[-6:]}",
+                         lat, lon, speed, course, heading,
+                         static.get('ship_type', ''), static.get('imo', ''),
+                         static.get('call_sign', ''), static.get('dest', ''))
+    
+    def _update_static(self, mmsi: str, msg):
+        """缓存类型5/24静态数据（船名、呼号等），附加到后续位置报告"""
+        static = self._static.setdefault(mmsi, {})
+        for key, attr in (('name', 'shipname'), ('call_sign', 'callsign'),
+                          ('dest', 'destination'), ('imo', 'imo'), ('ship_type', 'ship_type')):
+            value = getattr(msg, attr, None)
+            if value:
+                static[key] = str(value).strip()
 
 
 class AISParser:
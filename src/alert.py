@@ -3,10 +3,22 @@
 用于雷达目标异常检测和告警
 """
 
-from typing import List, Dict, Optional, Callable
+import math
+import operator
+from collections import Counter, deque
+from itertools import islice
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Callable, Union
 from datetime import datetime
 from enum import Enum
 
+import numpy as np
+
+try:
+    from src.alert_jit import RULE_NAMES as _JIT_RULE_NAMES, eval_rules as _eval_rules
+except ImportError:
+    _JIT_RULE_NAMES, _eval_rules = (), None
+
 
 class AlertLevel(Enum):
     """告警级别"""
@@ -18,11 +30,14 @@ class AlertLevel(Enum):
 class AlertRule:
     """告警规则"""
     
-    def __init__(self, name: str, level: AlertLevel, condition: callable, message: str = ""):
+    def __init__(self, name: str, level: AlertLevel, condition: callable, message: str = "",
+                 vector: Optional[Callable] = None):
         self.name = name
         self.level = level
         self.condition = condition
         self.message = message
+        # 向量化条件（可选）：输入 TargetBatch，返回布尔数组
+        self.vector = vector
     
     def check(self, target: dict) -> bool:
         """检查目标是否触发告警"""
@@ -32,103 +47,277 @@ class AlertRule:
             return False
 
 
+_NUMBER = (int, float, np.integer, np.floating)
+
+
+class NumericRule(AlertRule):
+    """
+    比较型告警规则
+    
+    terms 为 (字段, 比较函数, 阈值) 列表，全部满足时触发；字段缺失时取 defaults 中的值。
+    字段类型与阈值不符（如 None、字符串与数值比较）视为不满足，检查时无需捕获异常。
+    """
+    
+    def __init__(self, name: str, level: AlertLevel, terms: list, message: str = "",
+                 defaults: Optional[dict] = None, vector: Optional[Callable] = None):
+        super().__init__(name, level, self.check, message, vector)
+        self.defaults = defaults or {}
+        self.terms = [(field, op, threshold,
+                       _NUMBER if isinstance(threshold, _NUMBER) else type(threshold))
+                      for field, op, threshold in terms]
+    
+    def check(self, target: dict) -> bool:
+        for field, op, threshold, kind in self.terms:
+            value = target.get(field, self.defaults.get(field))
+            if not isinstance(value, kind) or not op(value, threshold):
+                return False
+        return True
+
+
+def _port_arc_lt(course, limit):
+    """航向相对 270° 顺时针偏移（取模）是否小于 limit，180 即 270°→0°→90° 半圆"""
+    return (course + 90.0) % 360.0 < limit
+
+
+def _column(targets: List[dict], key: str, default) -> np.ndarray:
+    """提取数值列，缺失或非数值记为NaN（与逐条比较时异常返回False一致）"""
+    # 须逐个判断类型：fromiter 会把 '35' 之类的数字字符串转成浮点，与逐条路径不一致
+    values = (t.get(key, default) for t in targets)
+    return np.fromiter((v if isinstance(v, _NUMBER) else np.nan for v in values),
+                       dtype=np.float64, count=len(targets))
+
+
+_OP_SOURCE = {operator.gt: '>', operator.ge: '>=', operator.lt: '<', operator.le: '<=',
+              operator.eq: '==', operator.ne: '!='}
+
+
+def _compile_rules(rules: List[AlertRule]) -> Callable[[dict], List[AlertRule]]:
+    """
+    将规则集生成为一个直线型判断函数：target -> 触发的规则列表
+    
+    NumericRule 的条件内联为比较表达式（同一字段只取一次），其余规则调用自身 check。
+    """
+    env = {}
+    lines = ['def _eval(t):', '    hits = []']
+    values = {}
+    for i, rule in enumerate(rules):
+        env[f'r{i}'] = rule
+        if not isinstance(rule, NumericRule):
+            lines.append(f'    if r{i}.check(t): hits.append(r{i})')
+            continue
+        
+        conds = []
+        for k, (field, op, threshold, kind) in enumerate(rule.terms):
+            default = rule.defaults.get(field)
+            key = (field, repr(default))
+            if key not in values:
+                var = values[key] = f'v{len(values)}'
+                env[f'{var}_default'] = default
+                lines.append(f'    {var} = t.get({field!r}, {var}_default)')
+            var = values[key]
+            
+            const = f'c{i}_{k}'
+            env[const] = threshold
+            if type(threshold) in (int, float, str) and (
+                    not isinstance(threshold, float) or math.isfinite(threshold)):
+                const = repr(threshold)
+            env[f'k{i}_{k}'] = kind
+            if op in _OP_SOURCE:
+                compare = f'{var} {_OP_SOURCE[op]} {const}'
+            else:
+                env[f'op{i}_{k}'] = op
+                compare = f'op{i}_{k}({var}, {const})'
+            conds.append(f'isinstance({var}, k{i}_{k}) and {compare}')
+        lines.append(f'    if {" and ".join(conds)}: hits.append(r{i})')
+    lines.append('    return hits')
+    
+    exec(compile('\n'.join(lines), '<alert_rules>', 'exec'), env)
+    return env['_eval']
+
+
+@dataclass
+class TargetBatch:
+    """
+    目标批次（列式存储）
+    
+    check_targets 的批量输入，规则的向量化条件直接在各列上计算。
+    上游可长期持有并原地更新各列，避免每帧重建目标字典。
+    """
+    ids: list
+    speed: np.ndarray
+    distance: np.ndarray
+    course: np.ndarray
+    source_is_radar: np.ndarray
+    targets: Optional[List[dict]] = None  # 原始目标字典（from_dicts 时保留，用于告警内容）
+    
+    @classmethod
+    def from_dicts(cls, targets: List[dict]) -> 'TargetBatch':
+        """目标字典列表 -> 列式批次，缺失或非数值记为NaN（速度缺失按0）"""
+        return cls(
+            ids=[t.get('id') for t in targets],
+            speed=_column(targets, 'speed_knots', 0),
+            distance=_column(targets, 'distance_nm', np.nan),
+            course=_column(targets, 'course_deg', np.nan),
+            source_is_radar=np.fromiter((t.get('source_type') == 'radar' for t in targets),
+                                        dtype=bool, count=len(targets)),
+            targets=targets,
+        )
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def target(self, i: int) -> dict:
+        """第 i 个目标的字典形式（无原始字典时由各列还原，NaN 视为缺失）"""
+        if self.targets is not None:
+            return self.targets[i]
+        target = {'id': self.ids[i],
+                  'source_type': 'radar' if self.source_is_radar[i] else None}
+        for key, column in (('speed_knots', self.speed), ('distance_nm', self.distance),
+                            ('course_deg', self.course)):
+            if not np.isnan(column[i]):
+                target[key] = float(column[i])
+        return target
+
+
 class AlertManager:
     """告警管理器"""
     
     def __init__(self):
         self.rules: List[AlertRule] = []
-        self.alerts: List[dict] = []
         self.callbacks: List[Callable] = []
         self.max_alerts = 1000  # 最多保留1000条告警
+        self.alerts: deque = deque(maxlen=self.max_alerts)  # 超出自动淘汰最旧告警
+        # 告警ID索引（同一目标重复触发同一规则时ID相同，按时间顺序保存）
+        self._alert_index: Dict[str, List[dict]] = {}
+        # 增量统计计数
+        self._by_level: Counter = Counter()
+        self._by_rule: Counter = Counter()
+        # 由当前规则集生成的判断函数，规则变化时置空、下次检查时重新生成
+        self._eval_fast: Optional[Callable] = None
         
         # 初始化默认规则
         self._init_default_rules()
+        # 默认规则 -> JIT内核输出列（numba 可用时批量检查走内核）
+        self._jit_columns: Dict[AlertRule, int] = {}
+        if _eval_rules is not None:
+            self._jit_columns = {rule: _JIT_RULE_NAMES.index(rule.name)
+                                 for rule in self.rules if rule.name in _JIT_RULE_NAMES}
     
     def _init_default_rules(self):
         """初始化默认告警规则"""
         
         # 1. 速度告警（速度过快）
-        self.add_rule(AlertRule(
+        self.add_rule(NumericRule(
             name="speed_high",
             level=AlertLevel.WARNING,
-            condition=lambda t: t.get('speed_knots', 0) > 30,
-            message="目标速度过快"
+            terms=[('speed_knots', operator.gt, 30)],
+            message="目标速度过快",
+            vector=lambda b: b.speed > 30
         ))
         
-        # 2. 速度告警（速度为0，可能是静止目标）
-        self.add_rule(AlertRule(
+        # 2. 速度告警（速度为0，可能是静止目标），无速度按0处理
+        self.add_rule(NumericRule(
             name="speed_zero",
             level=AlertLevel.INFO,
-            condition=lambda t: t.get('speed_knots', 0) < 0.5 and t.get('speed_knots', 0) >= 0,
-            message="目标静止"
+            terms=[('speed_knots', operator.lt, 0.5), ('speed_knots', operator.ge, 0)],
+            message="目标静止",
+            defaults={'speed_knots': 0},
+            vector=lambda b: (b.speed < 0.5) & (b.speed >= 0)
         ))
         
         # 3. 距离告警（太近）
-        self.add_rule(AlertRule(
+        self.add_rule(NumericRule(
             name="distance_close",
             level=AlertLevel.CRITICAL,
-            condition=lambda t: t.get('distance_nm', 999) < 0.3,
-            message="目标距离过近"
+            terms=[('distance_nm', operator.lt, 0.3)],
+            message="目标距离过近",
+            vector=lambda b: b.distance < 0.3
         ))
         
         # 4. 距离告警（太远）
-        self.add_rule(AlertRule(
+        self.add_rule(NumericRule(
             name="distance_far",
             level=AlertLevel.INFO,
-            condition=lambda t: t.get('distance_nm', 0) > 10,
-            message="目标距离过远"
+            terms=[('distance_nm', operator.gt, 10)],
+            message="目标距离过远",
+            vector=lambda b: b.distance > 10
         ))
         
         # 5. AIS告警（无AIS的小型目标）
-        self.add_rule(AlertRule(
+        self.add_rule(NumericRule(
             name="no_ais_small",
             level=AlertLevel.WARNING,
-            condition=lambda t: t.get('source_type') == 'radar' and t.get('speed_knots', 0) > 5,
-            message="高速雷达目标无AIS"
+            terms=[('source_type', operator.eq, 'radar'), ('speed_knots', operator.gt, 5)],
+            message="高速雷达目标无AIS",
+            vector=lambda b: b.source_is_radar & (b.speed > 5)
         ))
         
-        # 6. 方向告警（直冲向港口）
-        self.add_rule(AlertRule(
+        # 6. 方向告警（直冲向港口），航向在 270°→0°→90° 半圆内，无航向不告警
+        self.add_rule(NumericRule(
             name="heading_port",
             level=AlertLevel.CRITICAL,
-            condition=lambda t: 270 < t.get('course_deg', 0) < 90,
-            message="目标直冲向港口"
+            terms=[('course_deg', _port_arc_lt, 180.0)],
+            message="目标直冲向港口",
+            vector=lambda b: _port_arc_lt(b.course, 180.0)
         ))
     
     def add_rule(self, rule: AlertRule):
         """添加告警规则"""
         self.rules.append(rule)
+        self._eval_fast = None
     
     def remove_rule(self, name: str):
         """删除告警规则"""
         self.rules = [r for r in self.rules if r.name != name]
+        self._eval_fast = None
     
     def check_target(self, target: dict) -> List[dict]:
         """检查目标是否触发告警"""
-        triggered = []
+        if self._eval_fast is None:
+            self._eval_fast = _compile_rules(self.rules)
         
-        for rule in self.rules:
-            if rule.check(target):
-                alert = {
-                    'id': f"{rule.name}_{target.get('id', 'unknown')}",
-                    'target_id': target.get('id'),
-                    'rule': rule.name,
-                    'level': rule.level.value,
-                    'message': rule.message,
-                    'target': target,
-                    'timestamp': datetime.now().isoformat()
-                }
+        triggered = []
+        rules = self._eval_fast(target)
+        if rules:
+            timestamp = datetime.now().isoformat()
+            for rule in rules:
+                alert = self._make_alert(rule, target, timestamp)
                 triggered.append(alert)
                 self._add_alert(alert)
         
         return triggered
     
-    def check_targets(self, targets: List[dict]) -> List[dict]:
-        """批量检查目标"""
+    def check_targets(self, targets: Union[List[dict], TargetBatch]) -> List[dict]:
+        """
+        批量检查目标（目标字典列表或 TargetBatch）
+        
+        默认规则走JIT内核（numba 可用时），带向量化条件的规则按列一次算完，
+        其余规则逐个目标检查；结果顺序与逐个调用 check_target 一致（先目标后规则）。
+        """
+        if not len(targets):
+            return []
+        batch = targets if isinstance(targets, TargetBatch) else TargetBatch.from_dicts(targets)
+        
+        kernel_hits = None
+        hits = np.zeros((len(batch), len(self.rules)), dtype=bool)
+        for j, rule in enumerate(self.rules):
+            if rule in self._jit_columns:
+                if kernel_hits is None:
+                    kernel_hits = _eval_rules(batch.speed, batch.distance,
+                                              batch.source_is_radar, batch.course)
+                hits[:, j] = kernel_hits[:, self._jit_columns[rule]]
+            elif rule.vector is not None:
+                hits[:, j] = rule.vector(batch)
+            else:
+                hits[:, j] = [rule.check(batch.target(i)) for i in range(len(batch))]
+        
+        # 只为触发的（稀疏）位置构建告警
         all_alerts = []
-        for target in targets:
-            alerts = self.check_target(target)
-            all_alerts.extend(alerts)
+        timestamp = datetime.now().isoformat()
+        for i, j in zip(*np.nonzero(hits)):
+            alert = self._make_alert(self.rules[j], batch.target(i), timestamp)
+            all_alerts.append(alert)
+            self._add_alert(alert)
         
         # 触发回调
         for alert in all_alerts:
@@ -136,13 +325,37 @@ class AlertManager:
         
         return all_alerts
     
+    @staticmethod
+    def _make_alert(rule: AlertRule, target: dict, timestamp: str) -> dict:
+        return {
+            'id': f"{rule.name}_{target.get('id', 'unknown')}",
+            'target_id': target.get('id'),
+            'rule': rule.name,
+            'level': rule.level.value,
+            'message': rule.message,
+            'target': target,
+            'timestamp': timestamp
+        }
+    
     def _add_alert(self, alert: dict):
         """添加告警到历史"""
+        if len(self.alerts) == self.alerts.maxlen:
+            self._evict(self.alerts[0])
         self.alerts.append(alert)
-        
-        # 限制数量
-        if len(self.alerts) > self.max_alerts:
-            self.alerts = self.alerts[-self.max_alerts:]
+        self._alert_index.setdefault(alert['id'], []).append(alert)
+        self._by_level[alert['level']] += 1
+        self._by_rule[alert['rule']] += 1
+    
+    def _evict(self, alert: dict):
+        """从索引和统计中移除即将被淘汰的最旧告警"""
+        same_id = self._alert_index[alert['id']]
+        same_id.pop(0)
+        if not same_id:
+            del self._alert_index[alert['id']]
+        for counter, key in ((self._by_level, alert['level']), (self._by_rule, alert['rule'])):
+            counter[key] -= 1
+            if not counter[key]:
+                del counter[key]
     
     def register_callback(self, callback: Callable):
         """注册告警回调"""
@@ -158,12 +371,10 @@ class AlertManager:
     
     def get_alerts(self, level: str = None, limit: int = 100) -> List[dict]:
         """获取告警历史"""
-        alerts = self.alerts
-        
         if level:
-            alerts = [a for a in alerts if a['level'] == level]
+            return [a for a in self.alerts if a['level'] == level][-limit:]
         
-        return alerts[-limit:]
+        return list(islice(self.alerts, max(0, len(self.alerts) - limit), None))
     
     def get_active_alerts(self) -> List[dict]:
         """获取活跃告警（未确认）"""
@@ -171,31 +382,24 @@ class AlertManager:
     
     def acknowledge_alert(self, alert_id: str):
         """确认告警"""
-        for alert in self.alerts:
-            if alert['id'] == alert_id:
-                alert['acknowledged'] = True
-                alert['acknowledged_at'] = datetime.now().isoformat()
+        for alert in self._alert_index.get(alert_id, ()):
+            alert['acknowledged'] = True
+            alert['acknowledged_at'] = datetime.now().isoformat()
     
     def clear_alerts(self):
         """清空告警历史"""
-        self.alerts = []
+        self.alerts.clear()
+        self._alert_index.clear()
+        self._by_level.clear()
+        self._by_rule.clear()
     
     def get_statistics(self) -> dict:
         """获取告警统计"""
-        stats = {
+        return {
             'total': len(self.alerts),
-            'by_level': {},
-            'by_rule': {}
+            'by_level': dict(self._by_level),
+            'by_rule': dict(self._by_rule)
         }
-        
-        for alert in self.alerts:
-            level = alert['level']
-            rule = alert['rule']
-            
-            stats['by_level'][level] = stats['by_level'].get(level, 0) + 1
-            stats['by_rule'][rule] = stats['by_rule'].get(rule, 0) + 1
-        
-        return stats
 
 
 # 测试
@@ -0,0 +1,43 @@
+"""
+告警规则JIT内核
+将内置告警规则融合为一个 numba 函数，一次计算全部目标的触发矩阵
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+# 内核输出列顺序，与 AlertManager 默认规则名对应
+RULE_NAMES = (
+    'speed_high',
+    'speed_zero',
+    'distance_close',
+    'distance_far',
+    'no_ais_small',
+    'heading_port',
+)
+
+eval_rules = None
+
+if njit is not None:
+    # 不启用 fastmath：缺失值以NaN表示，需保持NaN比较恒为False
+    @njit('u1[:, :](f8[:], f8[:], b1[:], f8[:])', cache=True)
+    def eval_rules(speed, distance, is_radar, course):
+        """返回 (N, K) 触发矩阵，列顺序见 RULE_NAMES"""
+        n = speed.shape[0]
+        out = np.zeros((n, 6), dtype=np.uint8)
+        for i in range(n):
+            s = speed[i]
+            d = distance[i]
+            c = course[i]
+            out[i, 0] = s > 30.0
+            out[i, 1] = (s < 0.5) & (s >= 0.0)
+            out[i, 2] = d < 0.3
+            out[i, 3] = d > 10.0
+            out[i, 4] = is_radar[i] & (s > 5.0)
+            out[i, 5] = (c + 90.0) % 360.0 < 180.0
+        return out
@@ -3,14 +3,108 @@ Web API 模块 V2.0
 REST API + WebSocket
 """
 
+import gzip
+import hashlib
+import io
 import json
 import logging
-from datetime import datetime
-from flask import Flask, jsonify, request, render_template_string
-from flask_socketio import SocketIO, emit
-from typing import Dict, Any
+import math
+import os
+import platform
+import threading
+import time
+import zipfile
+from collections import namedtuple
+from functools import lru_cache
+from datetime import datetime, timezone
+from flask import Flask, Response, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+from flask_socketio import SocketIO, emit, join_room, leave_room
+import psutil
+from werkzeug.http import http_date
+from typing import Dict, Any, Optional, Set
 
-from config import Config
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from src.config import Config
+
+
+# 各页面共用的样式，以 /static/common.css 提供，浏览器缓存后各页面不再重复下载
+_COMMON_CSS = '''
+body { background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%); min-height: 100vh; }
+.glass { background: rgba(255,255,255,0.05); backdrop-filter: blur(10px); border: 1px solid rgba(255,255,255,0.1); border-radius: 12px; }
+input, select { background: rgba(0,0,0,0.3); border: 1px solid rgba(255,255,255,0.2); color: white; padding: 8px 12px; border-radius: 6px; }
+input:focus, select:focus { outline: none; border-color: #22c55e; }
+'''
+
+# 各页面共用的脚本，以 /static/common.js 提供
+_COMMON_JS = '''
+// 提示消息：页面中 #msg 元素复用，新消息到达时取消上一条的隐藏计时
+const showMsg = (() => {
+    let timer = null;
+    return (text, ok) => {
+        const el = document.getElementById('msg');
+        clearTimeout(timer);
+        el.textContent = text;
+        el.className = 'mt-4 p-4 rounded-lg ' + (ok ? 'bg-green-600' : 'bg-red-600');
+        timer = setTimeout(() => el.classList.add('hidden'), 3000);
+    };
+})();
+
+// Socket.IO 连接：直接建立 WebSocket，省去长轮询握手和升级；服务端不支持时回退为长轮询
+function connectSocket() {
+    const socket = io({transports: ['websocket'], upgrade: false});
+    socket.on('connect_error', () => { socket.io.opts.transports = ['polling', 'websocket']; });
+    return socket;
+}
+'''
+
+# 各页面 <head> 的公共部分，导入时替换模板中的 <!--common-head--> 标记
+_COMMON_HEAD = '''<script src="https://cdn.tailwindcss.com"></script>
+    <link rel="stylesheet" href="/static/common.css">
+    <script src="/static/common.js"></script>'''
+
+# 配置表单字段类型（页面提交前与服务端接收时按同一张表转换）
+FIELD_TYPES = {
+    'radar_enabled': 'bool',
+    'ais_enabled': 'bool',
+    'clutter_filter': 'bool',
+    'radar_port': 'int',
+    'origin_lat': 'float',
+    'origin_lon': 'float',
+    'ais_baudrate': 'int',
+    'assoc_distance': 'int',
+    'max_age': 'int',
+    'process_noise': 'float',
+    'min_distance': 'float',
+    'max_distance': 'float',
+    'min_speed': 'float',
+    'max_speed': 'float',
+    'http_port': 'int',
+    'ws_port': 'int',
+}
+
+_FIELD_CONVERTERS = {
+    'int': int,
+    'float': float,
+    'bool': lambda v: v if isinstance(v, bool) else str(v).lower() == 'true',
+}
+
+
+def coerce_form(data: Dict[str, Any]) -> Dict[str, Any]:
+    """按 FIELD_TYPES 转换配置表单字段（未列出的字段原样保留），无法转换或不是对象时抛出 ValueError/TypeError"""
+    if not isinstance(data, dict):
+        raise TypeError(f"配置须为对象，收到 {type(data).__name__}")
+    return {key: _FIELD_CONVERTERS[FIELD_TYPES[key]](value) if key in FIELD_TYPES else value
+            for key, value in data.items()}
 
 
 # 配置界面HTML
@@ -21,13 +115,7 @@ SETTINGS_TEMPLATE = '''
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>系统配置 - 雷达监控</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <style>
-        body { background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%); min-height: 100vh; }
-        .glass { background: rgba(255,255,255,0.05); backdrop-filter: blur(10px); border: 1px solid rgba(255,255,255,0.1); border-radius: 12px; }
-        input, select { background: rgba(0,0,0,0.3); border: 1px solid rgba(255,255,255,0.2); color: white; padding: 8px 12px; border-radius: 6px; }
-        input:focus, select:focus { outline: none; border-color: #22c55e; }
-    </style>
+    <!--common-head-->
 </head>
 <body class="text-white">
     <div class="container mx-auto px-4 py-6 max-w-4xl">
@@ -198,18 +286,10 @@ SETTINGS_TEMPLATE = '''
             </div>
         </form>
         
-        <div id="message" class="mt-4 p-4 rounded-lg hidden"></div>
+        <div id="msg" class="mt-4 p-4 rounded-lg hidden"></div>
     </div>
     
     <script>
-        function showMessage(msg, type) {
-            const el = document.getElementById('message');
-            el.textContent = msg;
-            el.className = 'mt-4 p-4 rounded-lg ' + (type === 'success' ? 'bg-green-600' : 'bg-red-600');
-            el.classList.remove('hidden');
-            setTimeout(() => el.classList.add('hidden'), 3000);
-        }
-        
         async function loadConfig() {
             try {
                 const res = await fetch('/api/config');
@@ -232,9 +312,9 @@ SETTINGS_TEMPLATE = '''
                     document.querySelector('[name="ais_baudrate"]').value = data.ais.connection?.baudrate || 38400;
                 }
                 
-                showMessage('配置已加载', 'success');
+                showMsg('配置已加载', true);
             } catch(e) {
-                showMessage('加载失败: ' + e.message, 'error');
+                showMsg('加载失败: ' + e.message, false);
             }
         }
         
@@ -243,23 +323,18 @@ SETTINGS_TEMPLATE = '''
             const formData = new FormData(e.target);
             const data = Object.fromEntries(formData);
             
-            // 转换类型
-            data.radar_enabled = data.radar_enabled === 'true';
-            data.ais_enabled = data.ais_enabled === 'true';
-            data.clutter_filter = data.clutter_filter === 'true';
-            data.radar_port = parseInt(data.radar_port);
-            data.origin_lat = parseFloat(data.origin_lat);
-            data.origin_lon = parseFloat(data.origin_lon);
-            data.ais_baudrate = parseInt(data.ais_baudrate);
-            data.assoc_distance = parseInt(data.assoc_distance);
-            data.max_age = parseInt(data.max_age);
-            data.process_noise = parseFloat(data.process_noise);
-            data.min_distance = parseFloat(data.min_distance);
-            data.max_distance = parseFloat(data.max_distance);
-            data.min_speed = parseFloat(data.min_speed);
-            data.max_speed = parseFloat(data.max_speed);
-            data.http_port = parseInt(data.http_port);
-            data.ws_port = parseInt(data.ws_port);
+            // 转换类型（类型表与服务端 FIELD_TYPES 相同），数值字段为空或非数字时不提交
+            const invalid = [];
+            for (const [k, t] of Object.entries(__FIELD_TYPES__)) {
+                if (!(k in data)) continue;
+                data[k] = t === 'int' ? parseInt(data[k]) : t === 'float' ? parseFloat(data[k]) : data[k] === 'true';
+                if (Number.isNaN(data[k])) invalid.push(k);
+            }
+            if (invalid.length) {
+                e.target.querySelector(`[name="${invalid[0]}"]`).focus();
+                showMsg('请填写有效数字: ' + invalid.join(', '), false);
+                return;
+            }
             
             try {
                 const res = await fetch('/api/config', {
@@ -267,16 +342,21 @@ SETTINGS_TEMPLATE = '''
                     headers: {'Content-Type': 'application/json'},
                     body: JSON.stringify(data)
                 });
-                showMessage('配置已保存，重启后生效', 'success');
+                if (!res.ok) {
+                    const body = await res.json().catch(() => ({}));
+                    showMsg('保存失败: ' + (body.message || res.status), false);
+                    return;
+                }
+                showMsg('配置已保存，重启后生效', true);
             } catch(e) {
-                showMessage('保存失败: ' + e.message, 'error');
+                showMsg('保存失败: ' + e.message, false);
             }
         };
         
         async function testConnection() {
-            showMessage('测试连接...', 'success');
+            showMsg('测试连接...', true);
             // 实际测试逻辑
-            setTimeout(() => showMessage('连接正常', 'success'), 1000);
+            setTimeout(() => showMsg('连接正常', true), 1000);
         }
         
         // 页面加载时读取配置
@@ -287,6 +367,9 @@ SETTINGS_TEMPLATE = '''
 '''
 
 
+SETTINGS_TEMPLATE = SETTINGS_TEMPLATE.replace('__FIELD_TYPES__', json.dumps(FIELD_TYPES))
+
+
 # 告警配置界面HTML
 ALERTS_TEMPLATE = '''
 <!DOCTYPE html>
@@ -295,12 +378,7 @@ ALERTS_TEMPLATE = '''
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>告警配置 - 雷达监控</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <style>
-        body { background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%); min-height: 100vh; }
-        .glass { background: rgba(255,255,255,0.05); backdrop-filter: blur(10px); border: 1px solid rgba(255,255,255,0.1); border-radius: 12px; }
-        input, select { background: rgba(0,0,0,0.3); border: 1px solid rgba(255,255,255,0.2); color: white; padding: 8px 12px; border-radius: 6px; }
-    </style>
+    <!--common-head-->
 </head>
 <body class="text-white">
     <div class="container mx-auto px-4 py-6 max-w-4xl">
@@ -410,14 +488,6 @@ ALERTS_TEMPLATE = '''
     </div>
     
     <script>
-        function showMsg(text, ok) {
-            const el = document.getElementById('msg');
-            el.textContent = text;
-            el.className = 'mt-4 p-4 rounded-lg ' + (ok ? 'bg-green-600' : 'bg-red-600');
-            el.classList.remove('hidden');
-            setTimeout(() => el.classList.add('hidden'), 3000);
-        }
-        
         function saveAlerts() {
             showMsg('告警配置已保存', true);
         }
@@ -439,11 +509,8 @@ TOOLS_TEMPLATE = '''
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>系统工具 - 雷达监控</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <style>
-        body { background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%); min-height: 100vh; }
-        .glass { background: rgba(255,255,255,0.05); backdrop-filter: blur(10px); border: 1px solid rgba(255,255,255,0.1); border-radius: 12px; }
-    </style>
+    <!--common-head-->
+    <script src="https://cdn.socket.io/4.5.0/socket.io.min.js"></script>
 </head>
 <body class="text-white">
     <div class="container mx-auto px-4 py-6 max-w-5xl">
@@ -523,17 +590,16 @@ TOOLS_TEMPLATE = '''
     </div>
     
     <script>
-        // 加载健康状态
-        async function loadHealth() {
-            try {
-                const res = await fetch('/api/health');
-                const data = await res.json();
-                document.getElementById('cpu').textContent = data.cpu_percent;
-                document.getElementById('memory').textContent = data.memory_percent;
-                document.getElementById('disk').textContent = data.disk_percent;
-                document.getElementById('process').textContent = data.process_count;
-            } catch(e) {}
-        }
+        // 健康状态由服务端推送（订阅时先收到完整快照，之后只收变化的字段）
+        const HEALTH_FIELDS = {cpu_percent: 'cpu', memory_percent: 'memory', disk_percent: 'disk', process_count: 'process'};
+        const socket = connectSocket();
+        socket.on('connect', () => socket.emit('subscribe_health'));
+        socket.on('health', (data) => {
+            for (const [key, value] of Object.entries(data)) {
+                const el = document.getElementById(HEALTH_FIELDS[key]);
+                if (el) el.textContent = value;
+            }
+        });
         
         // 加载日志
         async function loadLogs() {
@@ -546,14 +612,6 @@ TOOLS_TEMPLATE = '''
             }
         }
         
-        function showMsg(text, ok) {
-            const el = document.getElementById('msg');
-            el.textContent = text;
-            el.className = 'mt-4 p-4 rounded-lg ' + (ok ? 'bg-green-600' : 'bg-red-600');
-            el.classList.remove('hidden');
-            setTimeout(() => el.classList.add('hidden'), 3000);
-        }
-        
         function restartSystem() { showMsg('重启功能需要管理员权限', true); }
         function clearCache() { showMsg('缓存已清除', true); }
         function exportLogs() {
@@ -563,9 +621,7 @@ TOOLS_TEMPLATE = '''
         function checkNetwork() { showMsg('网络连接正常', true); }
         function viewLogs() { loadLogs(); }
         
-        loadHealth();
         loadLogs();
-        setInterval(loadHealth, 5000);
     </script>
 </body>
 </html>
@@ -580,20 +636,20 @@ HTML_TEMPLATE = '''
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>舟山定海渔港雷达监控系统</title>
-    <script src="https://cdn.tailwindcss.com"></script>
+    <!--common-head-->
     <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
     <script src="https://cdn.socket.io/4.5.0/socket.io.min.js"></script>
+    <script src="https://unpkg.com/@msgpack/msgpack@2.8.0/dist.es5+umd/msgpack.min.js"></script>
     <style>
-        body { background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%); min-height: 100vh; color: #e2e8f0; }
-        .glass { background: rgba(255,255,255,0.05); backdrop-filter: blur(10px); border: 1px solid rgba(255,255,255,0.1); border-radius: 12px; }
+        body { color: #e2e8f0; }
         .radar-circle { position: relative; width: 450px; height: 450px; margin: 0 auto; }
-        .radar-sweep { position: absolute; inset: 0; background: conic-gradient(from 0deg, transparent 0deg, rgba(0,255,136,0.15) 60deg, transparent 120deg); border-radius: 50%; animation: sweep 4s linear infinite; }
+        .radar-sweep { position: absolute; inset: 0; width: 100%; height: 100%; will-change: transform; animation: sweep 4s linear infinite; }
         @keyframes sweep { from { transform: rotate(0deg); } to { transform: rotate(360deg); } }
-        .target-dot { position: absolute; width: 14px; height: 14px; border-radius: 50%; transform: translate(-50%, -50%); }
+        .target-dot { position: absolute; left: 0; top: 0; width: 14px; height: 14px; border-radius: 50%; will-change: transform; }
         .target-radar { background: #22c55e; box-shadow: 0 0 12px #22c55e; }
         .target-ais { background: #3b82f6; box-shadow: 0 0 12px #3b82f6; }
         .target-fused { background: #f59e0b; box-shadow: 0 0 16px #f59e0b; animation: pulse 1s infinite; }
-        @keyframes pulse { 0%,100%{transform:translate(-50%,-50%)scale(1)} 50%{transform:translate(-50%,-50%)scale(1.4)} }
+        @keyframes pulse { 0%,100%{transform:scale(1)} 50%{transform:scale(1.4)} }
     </style>
 </head>
 <body>
@@ -645,7 +701,7 @@ HTML_TEMPLATE = '''
                         <line x1="225" y1="25" x2="225" y2="425" stroke="rgba(0,255,136,0.1)"/>
                         <line x1="25" y1="225" x2="425" y2="225" stroke="rgba(0,255,136,0.1)"/>
                     </svg>
-                    <div class="radar-sweep opacity-40"></div>
+                    <canvas class="radar-sweep opacity-40" id="sweep" width="450" height="450"></canvas>
                     <div id="targets" class="absolute inset-0"></div>
                 </div>
                 <div class="flex justify-center gap-6 mt-4 text-sm">
@@ -680,12 +736,33 @@ HTML_TEMPLATE = '''
         const listEl = document.getElementById('targetList');
         const logsEl = document.getElementById('logs');
         
+        // 扫描扇区只绘制一次，旋转由合成层的 transform 动画完成，不再逐帧重绘渐变
+        (function drawSweep() {
+            const canvas = document.getElementById('sweep');
+            const ctx = canvas.getContext('2d');
+            const r = canvas.width / 2;
+            if (!ctx.createConicGradient) {
+                canvas.style.background = 'conic-gradient(from 0deg, transparent 0deg, rgba(0,255,136,0.15) 60deg, transparent 120deg)';
+                canvas.style.borderRadius = '50%';
+                return;
+            }
+            const g = ctx.createConicGradient(-Math.PI / 2, r, r);
+            g.addColorStop(0, 'transparent');
+            g.addColorStop(60 / 360, 'rgba(0,255,136,0.15)');
+            g.addColorStop(120 / 360, 'transparent');
+            g.addColorStop(1, 'transparent');
+            ctx.fillStyle = g;
+            ctx.beginPath();
+            ctx.arc(r, r, r, 0, 2 * Math.PI);
+            ctx.fill();
+        })();
+        
         function updateTime() {
             timeEl.textContent = new Date().toLocaleTimeString('zh-CN');
         }
         setInterval(updateTime, 1000);
         
-        const socket = io();
+        const socket = connectSocket();
         let frameCount = 0;
         setInterval(() => { fpsEl.textContent = frameCount; frameCount = 0; }, 1000);
         
@@ -693,36 +770,145 @@ HTML_TEMPLATE = '''
             statusEl.className = 'w-3 h-3 rounded-full bg-green-500';
             document.getElementById('statusText').textContent = '已连接';
             log('系统已连接');
+            socket.emit('request_targets');
         });
         
-        socket.on('target_update', (data) => {
-            frameCount++;
-            radarEl.textContent = data.radar?.length || 0;
-            aisEl.textContent = data.ais?.length || 0;
-            fusedEl.textContent = data.fused?.length || 0;
-            
-            targetsEl.innerHTML = '';
-            (data.fused || []).forEach(t => {
-                const dot = document.createElement('div');
+        // 定期测量往返时延并上报上一次结果，服务端据此调节广播间隔
+        let lastRtt = null;
+        setInterval(() => {
+            if (!socket.connected) return;
+            const sentAt = performance.now();
+            socket.emit('client_rtt', lastRtt, () => { lastRtt = Math.round(performance.now() - sentAt); });
+        }, 2000);
+        
+        // 目标点按ID复用，每帧只改 translate（由合成器处理，不触发布局），多帧数据合并到一次绘制
+        const dots = new Map();
+        let pendingDots = null;
+        
+        // 目标列表同样按ID复用行节点，只改变化的文本
+        const rows = new Map();
+        const emptyRow = document.createElement('div');
+        emptyRow.className = 'text-gray-500 text-center';
+        emptyRow.textContent = '无目标';
+        
+        function createRow() {
+            const row = document.createElement('div');
+            row.className = 'glass p-3 flex justify-between';
+            row.innerHTML = `
+                <div><div class="font-bold text-yellow-400"></div><div class="text-sm text-gray-400"></div></div>
+                <div class="text-right text-sm"><div></div><div></div></div>`;
+            row.fields = row.querySelectorAll(':scope > div > div');
+            return row;
+        }
+        
+        function setText(el, text) {
+            if (el.textContent !== text) el.textContent = text;
+        }
+        
+        function renderList(targets) {
+            const seen = new Set();
+            let prev = null;
+            targets.forEach(t => {
+                let row = rows.get(t.id);
+                if (!row) {
+                    row = createRow();
+                    rows.set(t.id, row);
+                }
+                const [id, name, speed, course] = row.fields;
+                setText(id, String(t.id));
+                setText(name, String(t.name || t.mmsi || ''));
+                setText(speed, `${(t.speed_knots||0).toFixed(1)} kn`);
+                setText(course, `${(t.course_deg||0).toFixed(0)}°`);
+                // 按目标顺序就位，已在正确位置的行不移动
+                const next = prev ? prev.nextSibling : listEl.firstChild;
+                if (next !== row) listEl.insertBefore(row, next);
+                prev = row;
+                seen.add(t.id);
+            });
+            // 当前目标之后的节点（消失的目标、占位提示）全部移除
+            let stale = prev ? prev.nextSibling : listEl.firstChild;
+            while (stale) {
+                const next = stale.nextSibling;
+                stale.remove();
+                stale = next;
+            }
+            for (const id of rows.keys()) {
+                if (!seen.has(id)) rows.delete(id);
+            }
+            if (!prev) listEl.appendChild(emptyRow);
+        }
+        
+        function renderTargets() {
+            const targets = pendingDots;
+            pendingDots = null;
+            const seen = new Set();
+            targets.forEach(t => {
+                let dot = dots.get(t.id);
+                if (!dot) {
+                    dot = document.createElement('div');
+                    targetsEl.appendChild(dot);
+                    dots.set(t.id, dot);
+                }
+                const cls = `target-dot target-${t.source_type}`;
+                if (dot.className !== cls) dot.className = cls;
                 const angle = (t.course_deg || 0) * Math.PI / 180;
                 const dist = Math.min((t.distance_m || 1000) / 5000, 1) * 200;
-                const x = 225 + Math.sin(angle) * dist;
-                const y = 225 - Math.cos(angle) * dist;
-                dot.className = `target-dot target-${t.source_type}`;
-                dot.style.left = x + 'px';
-                dot.style.top = y + 'px';
+                const x = 225 + Math.sin(angle) * dist - 7;
+                const y = 225 - Math.cos(angle) * dist - 7;
+                dot.style.translate = `${x}px ${y}px`;
                 dot.title = `${t.id} - ${t.name || '未命名'}`;
-                targetsEl.appendChild(dot);
+                seen.add(t.id);
             });
-            
-            listEl.innerHTML = (data.fused || []).map(t => `
-                <div class="glass p-3 flex justify-between">
-                    <div><div class="font-bold text-yellow-400">${t.id}</div><div class="text-sm text-gray-400">${t.name || t.mmsi || ''}</div></div>
-                    <div class="text-right text-sm"><div>${(t.speed_knots||0).toFixed(1)} kn</div><div>${(t.course_deg||0).toFixed(0)}°</div></div>
-                </div>
-            `).join('') || '<div class="text-gray-500 text-center">无目标</div>';
+            for (const [id, dot] of dots) {
+                if (!seen.has(id)) {
+                    dot.remove();
+                    dots.delete(id);
+                }
+            }
+            renderList(targets);
+        }
+        
+        // 服务端启用 msgpack 时目标数据为二进制帧
+        // 完整快照为服务端预先序列化的 JSON 文本
+        const decode = (data) => data instanceof ArrayBuffer ? MessagePack.decode(new Uint8Array(data))
+            : typeof data === 'string' ? JSON.parse(data) : data;
+        
+        // 当前目标（按类别、ID索引）：target_update 为完整快照，target_delta 为与上次广播的差异
+        const DELTA_KEYS = {radar: 'id', ais: 'mmsi', fused: 'id'};
+        const targets = {radar: new Map(), ais: new Map(), fused: new Map()};
+        
+        socket.on('target_update', (raw) => {
+            const data = decode(raw);
+            for (const [kind, key] of Object.entries(DELTA_KEYS)) {
+                targets[kind].clear();
+                (data[kind] || []).forEach(t => targets[kind].set(t[key], t));
+            }
+            render();
+        });
+        
+        socket.on('target_delta', (raw) => {
+            const delta = decode(raw);
+            for (const [kind, key] of Object.entries(DELTA_KEYS)) {
+                const d = delta[kind];
+                if (!d) continue;
+                d.removed.forEach(id => targets[kind].delete(id));
+                d.added.forEach(t => targets[kind].set(t[key], t));
+                d.updated.forEach(t => targets[kind].set(t[key], t));
+            }
+            render();
         });
         
+        function render() {
+            frameCount++;
+            radarEl.textContent = targets.radar.size;
+            aisEl.textContent = targets.ais.size;
+            fusedEl.textContent = targets.fused.size;
+            
+            const fused = [...targets.fused.values()];
+            if (pendingDots === null) requestAnimationFrame(renderTargets);
+            pendingDots = fused;
+        }
+        
         function log(msg) {
             const time = new Date().toLocaleTimeString('zh-CN');
             logsEl.innerHTML = `<div>[${time}] ${msg}</div>` + logsEl.innerHTML;
@@ -736,6 +922,216 @@ HTML_TEMPLATE = '''
 '''
 
 
+# 静态内容随代码发布，以模块加载时间作为 Last-Modified
+_LOADED_AT = http_date(datetime.now(timezone.utc))
+
+# 静态内容：原文、gzip压缩体及两种编码各自的完整响应头，导入时计算一次
+Blob = namedtuple('Blob', 'body gzip headers gzip_headers')
+
+
+def _make_blob(body: bytes, content_type: str, cache_control: str, packed: bytes = None) -> Blob:
+    """构造静态内容（packed 为已有的gzip压缩体时不再重复压缩）"""
+    etag = hashlib.sha1(body).hexdigest()
+    common = {
+        'Content-Type': content_type,
+        'Last-Modified': _LOADED_AT,
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': cache_control,
+    }
+    return Blob(
+        body=body,
+        gzip=packed if packed is not None else gzip.compress(body, compresslevel=9),
+        headers={**common, 'ETag': f'"{etag}"'},
+        gzip_headers={**common, 'ETag': f'"{etag}-gz"', 'Content-Encoding': 'gzip'},
+    )
+
+
+def _blob_response(blob: Blob) -> Response:
+    """返回静态内容，客户端支持时直接发送gzip压缩体"""
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = Response(blob.gzip, headers=blob.gzip_headers)
+    else:
+        response = Response(blob.body, headers=blob.headers)
+    # If-None-Match / If-Modified-Since 命中时返回 304，不发送正文
+    return response.make_conditional(request)
+
+
+# 前端库本地副本（fetch_vendor.py 下载并gzip压缩），存在时页面改为从本机加载
+VENDOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'vendor')
+VENDOR_SCRIPTS = {
+    'tailwind.js': 'https://cdn.tailwindcss.com',
+    'plotly.min.js': 'https://cdn.plot.ly/plotly-latest.min.js',
+    'socket.io.min.js': 'https://cdn.socket.io/4.5.0/socket.io.min.js',
+    'msgpack.min.js': 'https://unpkg.com/@msgpack/msgpack@2.8.0/dist.es5+umd/msgpack.min.js',
+}
+
+
+def _load_vendor():
+    """读取本地前端库，返回 ({本地地址: Blob}, {CDN地址: 本地地址})，本地地址含内容哈希"""
+    blobs, urls = {}, {}
+    for name, url in VENDOR_SCRIPTS.items():
+        path = os.path.join(VENDOR_DIR, name + '.gz')
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            packed = f.read()
+        stem, ext = os.path.splitext(name)
+        local = f"/static/vendor/{stem}.{hashlib.sha1(packed).hexdigest()[:12]}{ext}"
+        blobs[local] = _make_blob(gzip.decompress(packed), 'application/javascript',
+                                  'public, max-age=31536000, immutable', packed)
+        urls[url] = local
+    return blobs, urls
+
+
+_VENDOR_BLOBS, _VENDOR_URLS = _load_vendor()
+
+
+def _localize(html: str) -> str:
+    """将页面中的 CDN 脚本地址替换为本地副本"""
+    for url, local in _VENDOR_URLS.items():
+        html = html.replace(f'src="{url}"', f'src="{local}"')
+    return html
+
+
+def _page_blob(html: str, content_type: str = 'text/html; charset=utf-8') -> Blob:
+    """页面预编码：替换公共头部与前端库地址"""
+    body = _localize(html.replace('<!--common-head-->', _COMMON_HEAD)).encode('utf-8')
+    return _make_blob(body, content_type, 'public, max-age=3600')
+
+
+# 全部静态内容按路径索引（在 before_request 中直接返回，无需注册视图）；
+# 页面均为纯静态内容（无模板变量），无需每次请求渲染
+_STATIC_BLOBS = {
+    '/ui': _page_blob(HTML_TEMPLATE),
+    '/settings': _page_blob(SETTINGS_TEMPLATE),
+    '/alerts': _page_blob(ALERTS_TEMPLATE),
+    '/tools': _page_blob(TOOLS_TEMPLATE),
+    '/static/common.css': _page_blob(_COMMON_CSS, 'text/css; charset=utf-8'),
+    '/static/common.js': _page_blob(_COMMON_JS, 'application/javascript; charset=utf-8'),
+    **_VENDOR_BLOBS,
+}
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """基于 orjson 的 JSON 序列化，jsonify 直接输出字节（需安装 orjson）"""
+    
+    option = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+    
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.option),
+            mimetype=self.mimetype)
+
+
+@lru_cache(maxsize=1)
+def _system_info() -> str:
+    """运行期间不变的系统信息（只采集一次），磁盘占用取健康状态缓存"""
+    return (f"OS: {platform.platform()}\n"
+            f"Python: {platform.python_version()}\n"
+            f"CPU: {psutil.cpu_count()} cores\n"
+            f"Memory: {psutil.virtual_memory().total / (1024**3):.1f} GB")
+
+
+def _tail_lines(path: str, n: int, block: int = 65536) -> list:
+    """读取文件最后 n 行（保留换行符）：从文件末尾按块向前读，不读入整个文件"""
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        data = b''
+        while pos > 0 and data.count(b'\n') <= n:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.splitlines(keepends=True)
+    if pos > 0:
+        lines = lines[1:]  # 未读到文件开头时第一行不完整
+    return [line.decode('utf-8', errors='replace') for line in lines[-n:]]
+
+
+class _ChunkSink(io.RawIOBase):
+    """不可回退的写入端：收集 zipfile 写出的数据块，供生成器逐块取走"""
+    
+    def __init__(self):
+        self._chunks = []
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _stream_zip(files, texts: Dict[str, str], chunk_size: int = 65536):
+    """逐块生成ZIP包：files 为 [(路径, 包内名称)]，texts 为 {包内名称: 文本}，内存占用与文件大小无关"""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for path, arcname in files:
+            # 按文件实际大小（及修改时间）建立条目，超过2GiB的日志自动使用zip64
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            info.compress_type = zf.compression
+            with open(path, 'rb') as src, zf.open(info, 'w') as dst:
+                while chunk := src.read(chunk_size):
+                    dst.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+        for arcname, text in texts.items():
+            zf.writestr(arcname, text)
+    yield sink.drain()
+
+
+# 未订阅网格或单个目标的客户端所在房间（接收全量目标快照）
+_ALL_ROOM = 'all'
+# 增量广播中各类目标的ID字段
+_DELTA_KEYS = {'radar': 'id', 'ais': 'mmsi', 'fused': 'id'}
+# 订阅健康状态推送的客户端所在房间
+_HEALTH_ROOM = 'health'
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _target_id_of(data) -> Optional[Any]:
+    """订阅请求中的目标ID（字符串或整数），缺失或类型不符时为 None"""
+    if not isinstance(data, dict):
+        return None
+    target_id = data.get('id')
+    if isinstance(target_id, str) and target_id or isinstance(target_id, int) and not isinstance(target_id, bool):
+        return target_id
+    return None
+
+
+class _ORJSONModule:
+    """Socket.IO 报文编解码用的 orjson 适配（提供与标准库 json 相同的 dumps/loads）"""
+    
+    @staticmethod
+    def dumps(obj, **kwargs) -> str:
+        # 与 HTTP 响应相同的回退序列化（Decimal、含 __html__ 的对象等）
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=ORJSONProvider.option).decode()
+    
+    @staticmethod
+    def loads(data, **kwargs):
+        return orjson.loads(data)
+
+
+def _msgpack_default(obj):
+    """msgpack 不支持的 numpy 标量/数组转为 Python 原生类型"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"无法序列化类型: {type(obj).__name__}")
+
+
 class RadarAPI:
     """雷达监控系统API"""
     
@@ -747,7 +1143,79 @@ class RadarAPI:
         # Flask应用
         self.app = Flask(__name__)
         self.app.config['SECRET_KEY'] = 'radar_secret_key'
-        self.socketio = SocketIO(self.app, cors_allowed_origins='*')
+        if orjson is not None:
+            self.app.json = ORJSONProvider(self.app)
+        # async_mode 为空时自动选择（已安装 eventlet/gevent 时优先使用）
+        ws_config = config.output_config.get('websocket', {})
+        socketio_options = {'async_mode': ws_config.get('async_mode')}
+        # 多进程部署时通过消息队列（如 redis://localhost:6379/0）在各进程间转发广播
+        if ws_config.get('message_queue'):
+            socketio_options['message_queue'] = ws_config['message_queue']
+            socketio_options['channel'] = ws_config.get('channel', 'radar')
+        # 心跳间隔/超时（秒），为空时使用 Socket.IO 默认值
+        # 允许的传输方式，如 ["websocket"] 时拒绝长轮询连接
+        for option in ('ping_interval', 'ping_timeout', 'transports'):
+            if ws_config.get(option):
+                socketio_options[option] = ws_config[option]
+        if orjson is not None:
+            socketio_options['json'] = _ORJSONModule
+        self.socketio = SocketIO(self.app, cors_allowed_origins='*', **socketio_options)
+        
+        # 目标广播合并：间隔内的多次更新只发送最新快照
+        # 客户端较多时放慢广播：超过 broadcast_fanout 个客户端后间隔按人数平方增长，最长 broadcast_max_interval
+        self.broadcast_interval = 0.05
+        self.broadcast_max_interval = 1.0
+        self.broadcast_fanout = 4
+        self._client_count = 0
+        self._pending_targets = None
+        self._broadcast_lock = threading.Lock()
+        self._broadcast_task = None
+        # 按客户端上报的往返时延（秒）调节广播间隔：平均值超过 rtt_high 时间隔放大 1.5 倍，低于 rtt_low 时缩小
+        self.rtt_high = 0.2
+        self.rtt_low = 0.05
+        self._client_rtt: Dict[str, float] = {}
+        self._rtt_updated = False
+        self._rtt_scale = 1.0
+        # 上次广播的目标 {类别: {ID: 目标}}，全量房间只发送与其相比的增量；
+        # 计算并发送增量与客户端加入全量房间（取基准快照）互斥，保证客户端基准与下一次增量一致
+        self._last_sent: Dict[str, Dict[Any, dict]] = {}
+        self._sent_lock = threading.Lock()
+        self._baseline = None  # (所属 _last_sent 各类别字典, 编码后的完整快照)
+        # 按经纬度网格分区订阅：订阅网格的客户端只收本网格目标，不再收全量快照
+        self.tile_deg = ws_config.get('tile_deg', 0.05)
+        self._tile_rooms: Dict[str, Set[str]] = {}  # {房间: 订阅者sid}
+        self._tiles_sent: Set[str] = set()  # 上次发送了目标的网格，目标全部离开时补发一次空数据
+        # 单目标订阅：订阅者只收该融合目标的状态变化
+        self._target_rooms: Dict[str, Set[str]] = {}
+        # 各客户端订阅的网格/目标房间，全部取消后恢复接收全量快照
+        self._client_rooms: Dict[str, Set[str]] = {}
+        # 目标数据以 msgpack 二进制帧发送（体积和解析耗时均小于JSON）
+        self.use_msgpack = bool(ws_config.get('msgpack'))
+        if self.use_msgpack and msgpack is None:
+            self.logger.warning("未安装 msgpack，目标数据仍以JSON发送")
+            self.use_msgpack = False
+        # 健康状态快照：后台每 health_interval 秒采样一次，请求直接读取快照
+        self.health_interval = 1.0
+        self._health = None
+        self._health_time = 0.0
+        self._health_lock = threading.Lock()
+        self._health_task = None
+        # 推送阈值：与上次推送值相差不小于该值的字段才推送
+        self.health_push_delta = 1.0
+        self._health_sent: Dict[str, float] = {}
+        
+        # /api/targets* 快照缓存：snapshot_ttl 内直接复用；融合数据版本未变时最长复用 snapshot_max_age 秒
+        # （融合目标按时间过期，版本号不变也需定期刷新）
+        self.snapshot_ttl = 0.05
+        self.snapshot_max_age = 1.0
+        self._snapshot = None  # (时间, 数据版本, 原始数据, {切片名: JSON正文}, {切片名: gzip正文})
+        # 小于该字节数的响应不压缩
+        self.gzip_min_size = 1024
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_packed = None  # (所属快照的正文字典, msgpack编码)
+        
+        # /api/config 响应缓存：(配置版本号, JSON正文, ETag)
+        self._config_cache = None
         
         # 数据存储
         self._setup_routes()
@@ -761,42 +1229,53 @@ class RadarAPI:
             return jsonify({
                 'status': 'running',
                 'version': self.config.get('system.version'),
-                'targets': self.fusion_engine.get_all_targets()['stats']
+                'targets': self._get_snapshot()[0]['stats']
             })
         
         @self.app.route('/api/targets', methods=['GET'])
         def get_targets():
             """获取所有目标"""
-            return jsonify(self.fusion_engine.get_all_targets())
+            return self._snapshot_response('all')
         
         @self.app.route('/api/targets/radar', methods=['GET'])
         def get_radar_targets():
             """获取雷达目标"""
-            return jsonify(self.fusion_engine.get_all_targets()['radar'])
+            return self._snapshot_response('radar')
         
         @self.app.route('/api/targets/ais', methods=['GET'])
         def get_ais_targets():
             """获取AIS目标"""
-            return jsonify(self.fusion_engine.get_all_targets()['ais'])
+            return self._snapshot_response('ais')
         
         @self.app.route('/api/targets/fused', methods=['GET'])
         def get_fused_targets():
             """获取融合目标"""
-            return jsonify(self.fusion_engine.get_all_targets()['fused'])
+            return self._snapshot_response('fused')
         
         @self.app.route('/api/config', methods=['GET'])
         def get_config():
-            """获取配置"""
-            return jsonify({
-                'radar': self.config.radar_config,
-                'ais': self.config.ais_config
-            })
+            """获取配置（按配置版本缓存序列化结果，ETag 命中时返回 304）"""
+            if self._config_cache is None or self._config_cache[0] != self.config.revision:
+                body = self.app.json.dumps({
+                    'radar': self.config.radar_config,
+                    'ais': self.config.ais_config
+                })
+                self._config_cache = (self.config.revision, body, hashlib.sha1(body.encode('utf-8')).hexdigest())
+            _, body, etag = self._config_cache
+            response = Response(body, content_type='application/json')
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response.make_conditional(request)
         
         @self.app.route('/api/config', methods=['POST'])
         def update_config():
             """更新配置"""
-            data = request.json
+            try:
+                data = coerce_form(request.json or {})
+            except (TypeError, ValueError) as e:
+                return jsonify({'status': 'error', 'message': f'字段类型错误: {e}'}), 400
             self.logger.info(f"收到配置更新: {data}")
+            self._config_cache = None
             return jsonify({'status': 'ok'})
         
         @self.app.route('/health', methods=['GET'])
@@ -804,80 +1283,48 @@ class RadarAPI:
             """健康检查"""
             return jsonify({'status': 'healthy'})
         
-        @self.app.route('/ui', methods=['GET'])
-        def ui():
-            """可视化界面"""
-            return render_template_string(HTML_TEMPLATE)
-        
-        @self.app.route('/settings', methods=['GET'])
-        def settings():
-            """配置界面"""
-            return render_template_string(SETTINGS_TEMPLATE)
-        
-        @self.app.route('/alerts', methods=['GET'])
-        def alerts():
-            """告警配置界面"""
-            return render_template_string(ALERTS_TEMPLATE)
-        
-        @self.app.route('/tools', methods=['GET'])
-        def tools():
-            """工具界面"""
-            return render_template_string(TOOLS_TEMPLATE)
+        @self.app.before_request
+        def serve_page():
+            """静态内容快速通道：按路径直接返回预编码内容，不进入视图分发"""
+            blob = _STATIC_BLOBS.get(request.path)
+            if blob is not None and request.method in ('GET', 'HEAD'):
+                return _blob_response(blob)
         
         @self.app.route('/api/logs', methods=['GET'])
         def get_logs():
             """获取日志"""
-            import os
             log_dir = self.config.get('system.log_dir', 'logs')
             log_file = os.path.join(log_dir, 'radar.log')
             lines = []
             if os.path.exists(log_file):
-                with open(log_file, 'r') as f:
-                    lines = f.readlines()[-50:]
+                lines = _tail_lines(log_file, 50)
             return jsonify({'logs': lines})
         
         @self.app.route('/api/logs/export', methods=['GET'])
         def export_logs():
-            """导出日志（打包下载）"""
-            import os
-            import zipfile
-            import io
-            from flask import make_response
-            
+            """导出日志（打包下载，边压缩边发送）"""
             log_dir = self.config.get('system.log_dir', 'logs')
-            data_dir = self.config.get('system.data_dir', 'data')
             
-            # 创建内存ZIP
-            memory_file = io.BytesIO()
+            # 所有日志文件（边读边压缩发送，不再限制单个文件大小）
+            files = []
+            if os.path.exists(log_dir):
+                for f in os.listdir(log_dir):
+                    if f.endswith('.log'):
+                        files.append((os.path.join(log_dir, f), f))
             
-            with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-                # 添加所有日志文件
-                if os.path.exists(log_dir):
-                    for f in os.listdir(log_dir):
-                        if f.endswith('.log'):
-                            fpath = os.path.join(log_dir, f)
-                            # 只添加最近的文件（避免太大）
-                            if os.path.getsize(fpath) < 50*1024*1024:  # < 50MB
-                                zf.write(fpath, f)
-                
-                # 添加配置副本（用于调试）
-                config_file = 'config/config.json'
-                if os.path.exists(config_file):
-                    zf.write(config_file, 'config.json')
-                
-                # 添加系统信息
-                import platform
-                import psutil
-                sys_info = f"""
+            # 配置副本（用于调试）
+            config_file = 'config/config.json'
+            if os.path.exists(config_file):
+                files.append((config_file, 'config.json'))
+            
+            # 系统信息
+            sys_info = f"""
 # 舟山定海渔港雷达监控系统 - 调试信息
 # 生成时间: {datetime.now().isoformat()}
 
 ## 系统信息
-OS: {platform.platform()}
-Python: {platform.python_version()}
-CPU: {psutil.cpu_count()} cores
-Memory: {psutil.virtual_memory().total / (1024**3):.1f} GB
-Disk: {psutil.disk_usage('/').percent}%
+{_system_info()}
+Disk: {self._health_snapshot()['disk_percent']}%
 
 ## 如何报告问题
 1. 描述问题现象
@@ -885,43 +1332,344 @@ Disk: {psutil.disk_usage('/').percent}%
 3. 附上此日志文件
 4. 如有错误，查看 radar_system_error.log
 """
-                zf.writestr('system_info.txt', sys_info)
             
-            memory_file.seek(0)
-            response = make_response(memory_file.getvalue())
+            response = Response(_stream_zip(files, {'system_info.txt': sys_info}), content_type='application/zip')
             response.headers['Content-Disposition'] = f'attachment; filename=radar_logs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
-            response.headers['Content-Type'] = 'application/zip'
             return response
         
         @self.app.route('/api/health', methods=['GET'])
         def get_health():
             """获取健康状态"""
-            import psutil
-            return jsonify({
-                'cpu_percent': psutil.cpu_percent(),
-                'memory_percent': psutil.virtual_memory().percent,
-                'disk_percent': psutil.disk_usage('/').percent,
-                'process_count': len(psutil.pids())
-            })
+            return jsonify(self._health_snapshot())
         
         # WebSocket事件
         @self.socketio.on('connect')
         def handle_connect():
             self.logger.info('客户端连接')
+            self._client_count += 1
+            join_room(_ALL_ROOM)
             emit('response', {'data': 'connected'})
         
         @self.socketio.on('disconnect')
         def handle_disconnect():
             self.logger.info('客户端断开')
+            self._client_count = max(0, self._client_count - 1)
+            self._client_rtt.pop(request.sid, None)
+            for room in self._client_rooms.pop(request.sid, ()):
+                self._release_room(room, request.sid)
+        
+        @self.socketio.on('client_rtt')
+        def handle_client_rtt(rtt_ms=None):
+            """客户端上报上一次测得的往返时延（毫秒），按指数滑动平均记录"""
+            if isinstance(rtt_ms, (int, float)) and rtt_ms >= 0:
+                rtt = rtt_ms / 1000
+                previous = self._client_rtt.get(request.sid)
+                self._client_rtt[request.sid] = rtt if previous is None else 0.7 * previous + 0.3 * rtt
+                self._rtt_updated = True
         
         @self.socketio.on('request_targets')
         def handle_request_targets():
-            """请求目标数据"""
-            emit('target_update', self.fusion_engine.get_all_targets())
+            """请求目标数据（与后续增量同一基准）"""
+            with self._sent_lock:
+                emit('target_update', self._baseline_payload())
+        
+        @self.socketio.on('subscribe_health')
+        def handle_subscribe_health():
+            """订阅健康状态推送，先回复一次完整快照"""
+            join_room(_HEALTH_ROOM)
+            emit('health', self._health_snapshot())
+        
+        @self.socketio.on('subscribe_tile')
+        def handle_subscribe_tile(data=None):
+            """订阅网格（data: {'lat', 'lon'}），改为只接收该网格内的目标"""
+            room = self._tile_room_of(data)
+            if room is None:
+                emit('subscribe_error', {'message': '网格订阅需要数值 lat/lon'})
+                return
+            self._subscribe(room, self._tile_rooms)
+        
+        @self.socketio.on('unsubscribe_tile')
+        def handle_unsubscribe_tile(data=None):
+            """取消网格订阅；data 为空时取消全部网格。不再订阅任何网格/目标时恢复接收全量快照"""
+            room = None
+            if data:
+                room = self._tile_room_of(data)
+                if room is None:
+                    emit('subscribe_error', {'message': '网格订阅需要数值 lat/lon'})
+                    return
+            self._unsubscribe(self._tile_rooms, room)
+        
+        @self.socketio.on('subscribe_target')
+        def handle_subscribe_target(data=None):
+            """订阅单个融合目标（data: {'id'}），改为只接收该目标的状态，先回复一次当前状态"""
+            target_id = _target_id_of(data)
+            if target_id is None:
+                emit('subscribe_error', {'message': '目标订阅需要 id'})
+                return
+            self._subscribe(f"target_{target_id}", self._target_rooms)
+            target = self._last_sent.get('fused', {}).get(target_id)
+            if target is not None:
+                emit('target_state', self._encode(target))
+        
+        @self.socketio.on('unsubscribe_target')
+        def handle_unsubscribe_target(data=None):
+            """取消单目标订阅；data 为空时取消全部目标。不再订阅任何网格/目标时恢复接收全量快照"""
+            room = None
+            if data:
+                target_id = _target_id_of(data)
+                if target_id is None:
+                    emit('subscribe_error', {'message': '目标订阅需要 id'})
+                    return
+                room = f"target_{target_id}"
+            self._unsubscribe(self._target_rooms, room)
+    
+    def _subscribe(self, room: str, rooms: Dict[str, Set[str]]):
+        """当前客户端加入网格/目标房间；首个订阅时离开全量房间"""
+        sid = request.sid
+        subscribed = self._client_rooms.setdefault(sid, set())
+        if not subscribed:
+            leave_room(_ALL_ROOM)
+        subscribed.add(room)
+        rooms.setdefault(room, set()).add(sid)
+        join_room(room)
+        emit('subscribed', {'room': room})
+    
+    def _unsubscribe(self, rooms: Dict[str, Set[str]], room: Optional[str] = None):
+        """当前客户端离开指定房间（room 为 None 时离开该类全部房间），订阅全部取消后重新加入全量房间"""
+        sid = request.sid
+        subscribed = self._client_rooms.get(sid)
+        if not subscribed:
+            return
+        for name in [room] if room is not None else [r for r in subscribed if r in rooms]:
+            if name in subscribed:
+                subscribed.discard(name)
+                leave_room(name)
+                self._release_room(name, sid)
+        if not subscribed:
+            del self._client_rooms[sid]
+            # 离开期间错过的删除不会再出现在增量中，先补发与下一次增量同一基准的完整快照
+            with self._sent_lock:
+                join_room(_ALL_ROOM)
+                emit('target_update', self._baseline_payload())
+    
+    def _release_room(self, room: str, sid: str):
+        """从房间订阅者中移除 sid，房间无人订阅时不再向其发送"""
+        for rooms in (self._tile_rooms, self._target_rooms):
+            members = rooms.get(room)
+            if members is not None:
+                members.discard(sid)
+                if not members:
+                    del rooms[room]
+    
+    def _baseline_payload(self):
+        """以上次广播的目标构成完整快照（须持有 _sent_lock）；尚未广播时返回当前快照"""
+        if not self._last_sent:
+            return self._snapshot_payload()
+        sent = tuple(self._last_sent.values())
+        cached = self._baseline
+        if cached is None or len(cached[0]) != len(sent) or any(a is not b for a, b in zip(cached[0], sent)):
+            data = {kind: list(targets.values()) for kind, targets in self._last_sent.items()}
+            payload = self._encode(data) if self.use_msgpack else self.app.json.dumps(data)
+            cached = self._baseline = (sent, payload)
+        return cached[1]
+    
+    def _get_snapshot(self):
+        """返回 (目标数据, {切片名: JSON正文}, {切片名: gzip正文})，并发请求共用同一次查询和序列化"""
+        now = time.monotonic()
+        version = getattr(self.fusion_engine, 'version', None)
+        with self._snapshot_lock:
+            cached = self._snapshot
+            if cached is not None:
+                age = now - cached[0]
+                if age < self.snapshot_ttl or (version is not None and version == cached[1]
+                                               and age < self.snapshot_max_age):
+                    return cached[2], cached[3], cached[4]
+            data = self.fusion_engine.get_all_targets()
+            bodies = {key: self.app.json.dumps(value) for key, value in data.items()}
+            # 完整快照由各切片拼接，不再整体序列化一次
+            bodies['all'] = '{' + ','.join(f'"{key}":{body}' for key, body in bodies.items()) + '}'
+            self._snapshot = (now, version, data, bodies, {})
+            return data, bodies, self._snapshot[4]
+    
+    def _snapshot_payload(self):
+        """完整快照的 Socket.IO 负载：JSON 直接复用快照正文，msgpack 每个快照只打包一次"""
+        data, bodies, _ = self._get_snapshot()
+        if not self.use_msgpack:
+            return bodies['all']
+        packed = self._snapshot_packed
+        if packed is None or packed[0] is not bodies:
+            packed = self._snapshot_packed = (bodies, self._encode(data))
+        return packed[1]
+    
+    def _snapshot_response(self, name: str) -> Response:
+        """返回快照切片；超过 gzip_min_size 且客户端支持时发送gzip（每个快照只压缩一次）"""
+        _, bodies, gzipped = self._get_snapshot()
+        body = bodies[name]
+        if len(body) >= self.gzip_min_size and 'gzip' in request.headers.get('Accept-Encoding', ''):
+            packed = gzipped.get(name)
+            if packed is None:
+                packed = gzipped[name] = gzip.compress(body.encode('utf-8'), compresslevel=6)
+            response = Response(packed, content_type='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(body, content_type='application/json')
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+    
+    def _health_snapshot(self) -> Dict[str, Any]:
+        """返回健康状态快照（超过 health_interval 未刷新时当场采样），首次调用时启动后台采样"""
+        with self._health_lock:
+            if self._health_task is None:
+                self._health_task = self.socketio.start_background_task(self._run_health_sampler)
+            if self._health is None or time.monotonic() - self._health_time >= self.health_interval:
+                self._refresh_health()
+            return self._health
+    
+    def _refresh_health(self):
+        """采样一次系统资源（cpu_percent 取两次采样之间的平均值，不阻塞）"""
+        self._health = {
+            'cpu_percent': psutil.cpu_percent(),
+            'memory_percent': psutil.virtual_memory().percent,
+            'disk_percent': psutil.disk_usage('/').percent,
+            'process_count': len(psutil.pids()),
+            'broadcast_interval_ms': round(self._broadcast_delay() * 1000)
+        }
+        self._health_time = time.monotonic()
+    
+    def _run_health_sampler(self):
+        """后台采样任务：采样后向订阅客户端推送变化的字段（单次失败只记录，不终止任务）"""
+        while True:
+            self.socketio.sleep(self.health_interval)
+            try:
+                with self._health_lock:
+                    self._refresh_health()
+                    delta = {key: value for key, value in self._health.items()
+                             if abs(value - self._health_sent.get(key, math.inf)) >= self.health_push_delta}
+                    self._health_sent.update(delta)
+                if delta:
+                    self.socketio.emit('health', delta, to=_HEALTH_ROOM)
+            except Exception:
+                self.logger.exception("健康状态推送失败")
+    
+    def _tile_room(self, lat: float, lon: float) -> str:
+        """经纬度所在网格的房间名"""
+        return f"tile_{math.floor(lat / self.tile_deg)}_{math.floor(lon / self.tile_deg)}"
+    
+    def _tile_room_of(self, data) -> Optional[str]:
+        """订阅请求中经纬度所在网格的房间名，缺失或非有限数值时为 None"""
+        if not isinstance(data, dict):
+            return None
+        lat, lon = data.get('lat'), data.get('lon')
+        if not all(_is_number(v) and math.isfinite(v) for v in (lat, lon)):
+            return None
+        return self._tile_room(lat, lon)
     
     def broadcast_targets(self, data: Dict[str, Any]):
-        """广播目标更新"""
-        self.socketio.emit('target_update', data)
+        """广播目标更新（按 broadcast_interval 合并，过期快照直接丢弃）"""
+        with self._broadcast_lock:
+            self._pending_targets = data
+            if self._broadcast_task is None:
+                self._broadcast_task = self.socketio.start_background_task(self._run_broadcast)
+    
+    def _run_broadcast(self):
+        """后台广播任务：每个间隔最多向全部客户端发送一次（单次失败只丢弃该快照，不终止任务）"""
+        while True:
+            self._adapt_to_rtt()
+            self.socketio.sleep(self._broadcast_delay())
+            with self._broadcast_lock:
+                data, self._pending_targets = self._pending_targets, None
+            if data is None:
+                continue
+            try:
+                with self._sent_lock:
+                    delta = self._make_delta(data)
+                    if delta is not None:
+                        self.socketio.emit('target_delta', self._encode(delta), to=_ALL_ROOM)
+                if delta is not None:
+                    self._emit_targets(delta['fused'])
+                self._emit_tiles(data)
+            except Exception:
+                self.logger.exception("目标广播失败")
+    
+    def _encode(self, data: Dict[str, Any]):
+        """目标数据编码：启用 msgpack 时打包为二进制，否则原样交给 Socket.IO 序列化"""
+        if self.use_msgpack:
+            return msgpack.packb(data, use_bin_type=True, default=_msgpack_default)
+        return data
+    
+    def _make_delta(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        与上次广播比较各类目标
+        
+        Returns:
+            {类别: {'added': [...], 'updated': [...], 'removed': [ID...]}}，无变化时为 None
+        """
+        delta = {}
+        changed = False
+        for kind, key in _DELTA_KEYS.items():
+            old = self._last_sent.get(kind, {})
+            new = {t[key]: t for t in data.get(kind, ())}
+            added = [t for tid, t in new.items() if tid not in old]
+            updated = [t for tid, t in new.items() if tid in old and old[tid] != t]
+            removed = [tid for tid in old if tid not in new]
+            delta[kind] = {'added': added, 'updated': updated, 'removed': removed}
+            changed = changed or bool(added or updated or removed)
+            self._last_sent[kind] = new
+        return delta if changed else None
+    
+    def _adapt_to_rtt(self):
+        """有新的时延上报时按客户端平均往返时延调整一次广播间隔倍数"""
+        if not self._rtt_updated:
+            return
+        self._rtt_updated = False
+        rtts = list(self._client_rtt.values())
+        if not rtts:
+            return
+        average = sum(rtts) / len(rtts)
+        if average > self.rtt_high:
+            self._rtt_scale *= 1.5
+        elif average < self.rtt_low:
+            self._rtt_scale /= 1.5
+        self._rtt_scale = min(max(self._rtt_scale, 1.0), self.broadcast_max_interval / self.broadcast_interval)
+    
+    def _broadcast_delay(self) -> float:
+        """当前广播间隔（秒）：客户端数不超过 broadcast_fanout 且网络通畅时为 broadcast_interval"""
+        extra = max(0, self._client_count - self.broadcast_fanout)
+        delay = (self.broadcast_interval + 0.0006 * extra * extra) * self._rtt_scale
+        return min(delay, self.broadcast_max_interval)
+    
+    def _emit_tiles(self, data: Dict[str, Any]):
+        """按网格分组，每个有订阅的非空网格发送一次；上次有目标、本次已空的网格发送一次空数据"""
+        if not self._tile_rooms:
+            self._tiles_sent.clear()
+            return
+        tiles: Dict[str, Dict[str, list]] = {}
+        for kind in ('ais', 'fused'):
+            for target in data.get(kind, ()):
+                if 'lat' not in target:
+                    continue
+                room = self._tile_room(target['lat'], target['lon'])
+                if room in self._tile_rooms:
+                    tiles.setdefault(room, {'ais': [], 'fused': []})[kind].append(target)
+        for room in self._tiles_sent - tiles.keys():
+            if room in self._tile_rooms:
+                self.socketio.emit('tile_targets', self._encode({'ais': [], 'fused': []}), to=room)
+        for room, payload in tiles.items():
+            self.socketio.emit('tile_targets', self._encode(payload), to=room)
+        self._tiles_sent = set(tiles)
+    
+    def _emit_targets(self, fused: Dict[str, list]):
+        """向有订阅的单目标房间发送新增/变化目标的状态，目标消失时发送 target_removed"""
+        if not self._target_rooms:
+            return
+        for target in fused['added'] + fused['updated']:
+            room = f"target_{target['id']}"
+            if room in self._target_rooms:
+                self.socketio.emit('target_state', self._encode(target), to=room)
+        for target_id in fused['removed']:
+            room = f"target_{target_id}"
+            if room in self._target_rooms:
+                self.socketio.emit('target_removed', {'id': target_id}, to=room)
     
     def broadcast_status(self, data: Dict[str, Any]):
         """广播状态更新"""
@@ -3,9 +3,13 @@ CCTV联动模块
 用于与CCTV系统联动，跟踪目标
 """
 
-from typing import Dict, List, Optional, Callable
+import logging
+import math
+from typing import Dict, List, Optional, Callable, Tuple
 from datetime import datetime
 
+import numpy as np
+
 
 class CCTVCamera:
     """CCTV摄像头"""
@@ -39,44 +43,48 @@ class CCTVLinkage:
     def __init__(self):
         self.cameras: Dict[str, CCTVCamera] = {}
         self.current_tracking: Dict[str, str] = {}  # target_id -> camera_id
-        self.callbacks: List[Callable] = []
+        # (回调, 是否保证不抛异常)
+        self.callbacks: List[Tuple[Callable, bool]] = []
+        self.logger = logging.getLogger('cctv')
+        # 摄像头坐标缓存（弧度，(N, 2)），增删摄像头后置空，下次查询时重建
+        self._coords: Optional[np.ndarray] = None
+        self._camera_list: List[CCTVCamera] = []
     
     def add_camera(self, camera: CCTVCamera):
         """添加摄像头"""
         self.cameras[camera.camera_id] = camera
+        self._coords = None
     
     def add_camera_by_params(self, camera_id: str, name: str, 
                            lat: float, lon: float) -> bool:
         """添加摄像头（简化参数）"""
         camera = CCTVCamera(camera_id, name, lat, lon)
         self.cameras[camera_id] = camera
+        self._coords = None
         return True
     
     def remove_camera(self, camera_id: str):
         """移除摄像头"""
         if camera_id in self.cameras:
             del self.cameras[camera_id]
+            self._coords = None
     
     def find_nearest_camera(self, lat: float, lon: float) -> Optional[CCTVCamera]:
         """找到最近的摄像头"""
         if not self.cameras:
             return None
         
-        import math
-        
-        nearest = None
-        min_distance = float('inf')
-        
-        for camera in self.cameras.values():
-            # 简化距离计算
-            distance = math.sqrt(
-                (camera.lat - lat)**2 + (camera.lon - lon)**2
-            )
-            if distance < min_distance:
-                min_distance = distance
-                nearest = camera
+        if self._coords is None or len(self._camera_list) != len(self.cameras):
+            self._camera_list = list(self.cameras.values())
+            self._coords = np.radians([[c.lat, c.lon] for c in self._camera_list])
         
-        return nearest
+        # 半正矢公式的 a 项随大圆距离单调递增，比较远近时无需开方和反三角
+        lat_r = math.radians(lat)
+        lon_r = math.radians(lon)
+        cam_lat = self._coords[:, 0]
+        a = (np.sin((cam_lat - lat_r) / 2) ** 2 +
+             math.cos(lat_r) * np.cos(cam_lat) * np.sin((self._coords[:, 1] - lon_r) / 2) ** 2)
+        return self._camera_list[int(np.argmin(a))]
     
     def track_target(self, target_id: str, lat: float, lon: float) -> dict:
         """跟踪目标"""
@@ -90,7 +98,6 @@ class CCTVLinkage:
             }
         
         # 计算摄像头朝向（简化）
-        import math
         delta_lat = lat - camera.lat
         delta_lon = lon - camera.lon
         
@@ -138,17 +145,26 @@ class CCTVLinkage:
             }
         return status
     
-    def register_callback(self, callback: Callable):
-        """注册回调"""
-        self.callbacks.append(callback)
+    def register_callback(self, callback: Callable, *, nothrow: bool = False):
+        """
+        注册回调
+        
+        Args:
+            callback: 回调函数，参数为联动信息
+            nothrow: 回调保证不抛异常时为 True，触发时直接调用，不做异常捕获
+        """
+        self.callbacks.append((callback, nothrow))
     
     def _trigger_callbacks(self, data: dict):
-        """触发回调"""
-        for callback in self.callbacks:
+        """触发回调（回调异常记录日志，不影响其他回调）"""
+        for callback, nothrow in self.callbacks:
+            if nothrow:
+                callback(data)
+                continue
             try:
                 callback(data)
-            except Exception as e:
-                print(f"CCTV callback error: {e}")
+            except Exception:
+                self.logger.exception("CCTV回调异常")
     
     def get_all_cameras(self) -> List[dict]:
         """获取所有摄像头"""
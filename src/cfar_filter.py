@@ -6,6 +6,35 @@ CFAR检测和杂波过滤模块
 import numpy as np
 from typing import List, Tuple
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+_cfar_ca = None
+
+if njit is not None:
+    @njit('void(f8[:], i8, i8, f8, f8[:])', cache=True)
+    def _cfar_ca(signal, G, R, alpha, out):
+        """CA-CFAR：参考窗口滑动时增量维护左右参考单元和，逐单元比较写入 out"""
+        n = signal.shape[0]
+        start = G + R
+        left = 0.0
+        right = 0.0
+        for k in range(start - G - R, start - G):
+            left += signal[k]
+        for k in range(start + G, start + G + R):
+            right += signal[k]
+        scale = alpha / (2 * R)
+        for i in range(start, n - G - R):
+            if signal[i] > scale * (left + right):
+                out[i] = 1.0
+            # 窗口右移一格：左侧进入 i-G、移出 i-G-R；右侧进入 i+G+R、移出 i+G
+            left += signal[i - G] - signal[i - G - R]
+            if i + G + R < n:
+                right += signal[i + G + R] - signal[i + G]
+
 
 class CFARDetector:
     """
@@ -49,25 +78,28 @@ class CFARDetector:
         """
         n = len(signal)
         results = np.zeros(n)
+        G, R = self.guard_cells, self.ref_cells
+        if n <= 2 * (G + R):
+            return results
         
-        for i in range(self.guard_cells + self.ref_cells, 
-                      n - self.guard_cells - self.ref_cells):
-            # 参考单元
-            ref_left = signal[i - self.ref_cells - self.guard_cells:
-                            i - self.guard_cells]
-            ref_right = signal[i + self.guard_cells:
-                              i + self.guard_cells + self.ref_cells]
-            ref_cells = np.concatenate([ref_left, ref_right])
-            
-            # 噪声估计（平均）
-            noise_estimate = np.mean(ref_cells)
-            
-            # 阈值
-            threshold = self.alpha * noise_estimate
-            
-            # 检测
-            if signal[i] > threshold:
-                results[i] = 1
+        if _cfar_ca is not None:
+            _cfar_ca(np.ascontiguousarray(signal, dtype=np.float64), G, R, float(self.alpha), results)
+            return results
+        
+        # 前缀和：任意区间和 signal[a:b] = csum[b] - csum[a]
+        csum = np.concatenate(([0.0], np.cumsum(signal, dtype=np.float64)))
+        i = np.arange(G + R, n - G - R)
+        
+        # 参考单元：左侧 signal[i-R-G : i-G]，右侧 signal[i+G : i+G+R]
+        ref_left = csum[i - G] - csum[i - G - R]
+        ref_right = csum[i + G + R] - csum[i + G]
+        
+        # 噪声估计（平均）与阈值
+        noise_estimate = (ref_left + ref_right) / (2 * R)
+        threshold = self.alpha * noise_estimate
+        
+        # 检测
+        results[i] = signal[i] > threshold
         
         return results
 
@@ -99,22 +131,28 @@ class ClutterFilter:
         Returns:
             过滤后的目标列表
         """
-        filtered = []
+        if not targets:
+            return []
+        n = len(targets)
+        speeds = np.fromiter((t.get('speed_knots', 0) for t in targets), dtype=np.float64, count=n)
+        distances = np.fromiter((t.get('distance_nm', 0) for t in targets), dtype=np.float64, count=n)
+        keep = self.filter_mask(speeds, distances)
+        return [targets[i] for i in np.flatnonzero(keep)]
+    
+    def filter_mask(self, speeds: np.ndarray, distances: np.ndarray) -> np.ndarray:
+        """
+        按列过滤（速度、距离数组一次比较）
         
-        for target in targets:
-            # 速度过滤
-            speed = target.get('speed_knots', 0)
-            if speed < self.min_speed or speed > self.max_speed:
-                continue
-            
-            # 距离过滤
-            distance = target.get('distance_nm', 0)
-            if distance < self.min_distance or distance > self.max_distance:
-                continue
+        Args:
+            speeds: 速度数组（节）
+            distances: 距离数组（海里）
             
-            filtered.append(target)
-        
-        return filtered
+        Returns:
+            保留掩码（True=保留）
+        """
+        # 以"超出范围"判定剔除，与逐目标比较一致（NaN 不剔除）
+        return ~((speeds < self.min_speed) | (speeds > self.max_speed) |
+                 (distances < self.min_distance) | (distances > self.max_distance))
     
     def filter_static_targets(self, targets: List[dict]) -> List[dict]:
         """过滤静止目标"""
@@ -3,8 +3,17 @@
 基于AIS信息对船舶进行分类
 """
 
+from bisect import bisect_right
+from functools import lru_cache
 from typing import Dict, Optional
 
+import numpy as np
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 
 # AIS船型分类映射
 SHIP_TYPE_MAP = {
@@ -49,6 +58,51 @@ SPEED_CATEGORIES = {
     'very_fast': (25, 999)    # 极速
 }
 
+# 速度分段边界（区间首尾相接）：bisect_right(边界, 速度) 即 _SPEED_NAMES 下标，区间外为 unknown
+_SPEED_BINS = sorted(SPEED_CATEGORIES.items(), key=lambda item: item[1][0])
+_SPEED_EDGES = [float(lo) for _, (lo, _) in _SPEED_BINS] + [float(_SPEED_BINS[-1][1][1])]
+_SPEED_NAMES = ['unknown'] + [category for category, _ in _SPEED_BINS] + ['unknown']
+_SPEED_EDGES_ARRAY = np.array(_SPEED_EDGES)
+_SPEED_NAMES_ARRAY = np.array(_SPEED_NAMES, dtype=object)
+
+
+
+def _build_ship_type_automaton():
+    """
+    构建船型关键字的 Aho-Corasick 自动机，值为 (优先级, 船型)
+    
+    同一关键字归属多个船型时取 SHIP_TYPE_MAP 中靠前的；空关键字无法加入自动机，由调用方兜底。
+    未安装 pyahocorasick 时返回 None。
+    """
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for priority, (category, keywords) in enumerate(SHIP_TYPE_MAP.items()):
+        for keyword in keywords:
+            if keyword and keyword not in automaton:
+                automaton.add_word(keyword, (priority, category))
+    automaton.make_automaton()
+    return automaton
+
+
+_SHIP_TYPE_AUTOMATON = _build_ship_type_automaton()
+# 空关键字匹配任意字符串，作为自动机无命中时的结果
+_SHIP_TYPE_DEFAULT = next((category for category, keywords in SHIP_TYPE_MAP.items() if '' in keywords), None)
+
+
+@lru_cache(maxsize=4096)
+def _match_ship_type(ship_type: str) -> Optional[str]:
+    """按 SHIP_TYPE_MAP 顺序查找首个匹配关键字的船型（船型字符串取值很少，按字符串缓存结果）"""
+    if _SHIP_TYPE_AUTOMATON is not None:
+        # 一次扫描找出所有命中的关键字，取优先级最高（SHIP_TYPE_MAP 中最靠前）的船型
+        best = min((value for _, value in _SHIP_TYPE_AUTOMATON.iter(ship_type)), default=None)
+        return best[1] if best is not None else _SHIP_TYPE_DEFAULT
+    for category, keywords in SHIP_TYPE_MAP.items():
+        for keyword in keywords:
+            if keyword in ship_type:
+                return category
+    return None
+
 
 class TargetClassifier:
     """目标分类器"""
@@ -73,10 +127,9 @@ class TargetClassifier:
         if not ship_type:
             return 'unknown'
         
-        for category, keywords in self.ship_type_map.items():
-            for keyword in keywords:
-                if keyword in ship_type:
-                    return category
+        category = _match_ship_type(ship_type)
+        if category is not None:
+            return category
         
         # 基于MMSI猜测
         mmsi = ais_target.get('mmsi', '')
@@ -111,10 +164,21 @@ class TargetClassifier:
         Returns:
             机动性分类: anchored/slow/normal/fast/very_fast
         """
-        for category, (min_speed, max_speed) in SPEED_CATEGORIES.items():
-            if min_speed <= speed_knots < max_speed:
-                return category
-        return 'unknown'
+        if speed_knots != speed_knots:  # NaN
+            return 'unknown'
+        return _SPEED_NAMES[bisect_right(_SPEED_EDGES, speed_knots)]
+    
+    def classify_speeds(self, speeds: np.ndarray) -> np.ndarray:
+        """
+        批量速度分类
+        
+        Args:
+            speeds: 速度数组（节）
+            
+        Returns:
+            机动性分类数组（元素为 str）
+        """
+        return _SPEED_NAMES_ARRAY[np.searchsorted(_SPEED_EDGES_ARRAY, speeds, side='right')]
     
     def classify_target(self, target: dict) -> dict:
         """
@@ -126,6 +190,10 @@ class TargetClassifier:
         Returns:
             分类结果字典
         """
+        return self._classify(target, self.classify_speed_category(target.get('speed_knots', 0)))
+    
+    def _classify(self, target: dict, speed_category: str) -> dict:
+        """综合分类（速度分类已算好）"""
         result = {
             'ship_type': 'unknown',
             'region': 'unknown',
@@ -142,7 +210,7 @@ class TargetClassifier:
         
         # 速度分类
         speed = target.get('speed_knots', 0)
-        result['speed_category'] = self.classify_speed_category(speed)
+        result['speed_category'] = speed_category
         
         # 判断是否为小型目标（无AIS且低速）
         if not target.get('mmsi') and speed < 3:
@@ -158,8 +226,11 @@ class TargetClassifier:
         return result
     
     def classify_targets(self, targets: list) -> list:
-        """批量分类"""
-        return [self.classify_target(t) for t in targets]
+        """批量分类（速度分类对全部目标一次计算）"""
+        if not targets:
+            return []
+        speeds = np.fromiter((t.get('speed_knots', 0) for t in targets), dtype=np.float64, count=len(targets))
+        return [self._classify(t, c) for t, c in zip(targets, self.classify_speeds(speeds))]
 
 
 # 测试
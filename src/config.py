@@ -3,13 +3,22 @@
 支持配置热加载、分级配置、环境变量
 """
 
+import copy
 import json
 import os
 import logging
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, List, Optional
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 配置项不存在的标记（区别于值为 None）
+_MISSING = object()
+
 
 class Config:
     """配置管理类"""
@@ -57,8 +66,11 @@ class Config:
             "or_network": {
                 "enabled": False,
                 "ip": "127.0.0.1",
-                "port": 5001
-            }
+                "port": 5001,
+                "recv_buffer": 12582912
+            },
+            "cpu_affinity": None,
+            "realtime_priority": 0
         },
         "fusion": {
             "enabled": True,
@@ -82,14 +94,23 @@ class Config:
             "storage": {
                 "enabled": True,
                 "path": "data/trajectories",
-                "format": "json"
+                "format": "json",
+                "flush_interval": 1.0
             }
         },
         "output": {
             "websocket": {
                 "enabled": True,
                 "host": "127.0.0.1",  # 调试用，生产环境改为具体IP
-                "port": 8080
+                "port": 8080,
+                "async_mode": None,  # eventlet/gevent/threading，为空时自动选择
+                "ping_interval": 25,  # 心跳间隔（秒）
+                "ping_timeout": 60,  # 心跳超时（秒）
+                "transports": None,  # 允许的传输方式，["websocket"] 时禁用长轮询，为空时两者均可
+                "message_queue": None,  # 多进程部署时的消息队列，如 redis://localhost:6379/0
+                "channel": "radar",
+                "tile_deg": 0.05,  # 网格订阅的网格大小（度）
+                "msgpack": False  # 目标数据以 msgpack 二进制帧发送（需安装 msgpack）
             },
             "http": {
                 "enabled": True,
@@ -116,31 +137,41 @@ class Config:
         """初始化配置"""
         self.logger = logging.getLogger('config')
         self.config_path = config_path
-        self.config = {}
+        # 只保存用户配置，读取时再与默认配置按路径合并：{点号路径: 合并结果}
+        # 首次 set() 时合并出完整配置存入 _user，之后不再合并默认配置
+        self._user = {}
+        self._merged = False
+        self._cache = {}
+        # 配置版本号：每次加载或 set() 后递增，供缓存判断配置是否变化
+        self.revision = 0
         self._load_config()
     
     def _load_config(self):
         """加载配置文件"""
+        self.revision += 1
+        self._cache = {}
+        self._merged = False
         if self.config_path and os.path.exists(self.config_path):
             try:
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    user_config = json.load(f)
-                self._merge_config(user_config)
+                if orjson is not None:
+                    user_config = orjson.loads(Path(self.config_path).read_bytes())
+                else:
+                    with open(self.config_path, 'r', encoding='utf-8') as f:
+                        user_config = json.load(f)
+                if not isinstance(user_config, dict):
+                    raise ValueError("配置文件顶层必须是对象")
+                self._user = user_config
                 self.logger.info(f"已加载配置文件: {self.config_path}")
             except Exception as e:
                 self.logger.error(f"加载配置文件失败: {e}")
-                self._use_default()
+                self._user = {}
         else:
-            self._use_default()
+            self._user = {}
             self.logger.info("使用默认配置")
     
-    def _merge_config(self, user_config: dict):
-        """合并用户配置与默认配置"""
-        self.config = self._deep_merge(self.DEFAULT_CONFIG, user_config)
-    
     def _deep_merge(self, default: dict, user: dict) -> dict:
-        """深度合并字典"""
-        result = default.copy()
+        """深度合并字典（默认配置部分为副本，修改结果不影响 DEFAULT_CONFIG）"""
+        result = copy.deepcopy(default)
         for key, value in user.items():
             if key in result and isinstance(result[key], dict) and isinstance(value, dict):
                 result[key] = self._deep_merge(result[key], value)
@@ -148,32 +179,59 @@ class Config:
                 result[key] = value
         return result
     
-    def _use_default(self):
-        """使用默认配置"""
-        self.config = self.DEFAULT_CONFIG.copy()
+    def _resolve(self, keys: List[str]) -> Any:
+        """按路径取用户配置与默认配置合并后的值，不存在时返回 _MISSING"""
+        user, default = self._user, ({} if self._merged else self.DEFAULT_CONFIG)
+        for k in keys:
+            if user is _MISSING:
+                default = default.get(k, _MISSING) if isinstance(default, dict) else _MISSING
+            elif isinstance(user, dict):
+                default = default.get(k, _MISSING) if isinstance(default, dict) else _MISSING
+                user = user.get(k, _MISSING)
+            else:
+                return _MISSING
+        if user is _MISSING:
+            return copy.deepcopy(default) if isinstance(default, dict) else default
+        if isinstance(user, dict) and isinstance(default, dict):
+            return self._deep_merge(default, user)
+        return user
+    
+    def _lookup(self, key: str) -> Any:
+        """带缓存的 _resolve，key 为点号路径（空字符串表示整个配置）"""
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._cache[key] = self._resolve(key.split('.') if key else [])
+        return value
+    
+    @property
+    def config(self) -> dict:
+        """合并后的完整配置"""
+        return self._lookup('')
     
     def get(self, key: str, default: Any = None) -> Any:
         """获取配置项，支持点号访问"""
-        keys = key.split('.')
-        value = self.config
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-                if value is None:
-                    return default
-            else:
-                return default
+        value = self._lookup(key)
+        if value is _MISSING or value is None:
+            return default
         return value
     
     def set(self, key: str, value: Any):
         """设置配置项"""
+        if not self._merged:
+            self._user = self._resolve([])
+            self._merged = True
         keys = key.split('.')
-        config = self.config
+        config = self._user
         for k in keys[:-1]:
             if k not in config:
                 config[k] = {}
             config = config[k]
         config[keys[-1]] = value
+        # 清除该路径、其上级和下级的缓存
+        self._cache = {cached: v for cached, v in self._cache.items()
+                       if cached and cached != key and not cached.startswith(key + '.')
+                       and not key.startswith(cached + '.')}
+        self.revision += 1
     
     def save(self, path: Optional[str] = None):
         """保存配置到文件"""
@@ -187,23 +245,23 @@ class Config:
     
     @property
     def radar_config(self) -> dict:
-        return self.config.get('radar', {})
+        return self.get('radar', {})
     
     @property
     def ais_config(self) -> dict:
-        return self.config.get('ais', {})
+        return self.get('ais', {})
     
     @property
     def fusion_config(self) -> dict:
-        return self.config.get('fusion', {})
+        return self.get('fusion', {})
     
     @property
     def output_config(self) -> dict:
-        return self.config.get('output', {})
+        return self.get('output', {})
     
     @property
     def monitoring_config(self) -> dict:
-        return self.config.get('monitoring', {})
+        return self.get('monitoring', {})
     
     def __repr__(self):
         return f"Config(version={self.get('system.version')}, radar={self.radar_config.get('enabled')}, ais={self.ais_config.get('enabled')})"
@@ -5,18 +5,27 @@ API增强模块
 
 from flask import Flask, jsonify, request
 import json
+from collections import deque
 from datetime import datetime
+from itertools import islice
 
 # 全局变量
 current_tracker = None
 tracker_algorithm = 'KF'
+# 保留最近100条，超出时自动丢弃最早的
 performance_stats = {
-    'latency': [],
-    'memory': [],
+    'latency': deque(maxlen=100),
+    'memory': deque(maxlen=100),
     'fps': 0
 }
 
 
+def _recent_mean(values: deque, count: int = 10) -> float:
+    """最近 count 条数据的平均值（不足 count 条时按实际条数）"""
+    recent = list(islice(values, max(0, len(values) - count), None))
+    return sum(recent) / len(recent) if recent else 0
+
+
 def create_api_routes(app, get_tracker_func):
     """创建增强API路由"""
     
@@ -61,9 +70,9 @@ def create_api_routes(app, get_tracker_func):
             'timestamp': datetime.now().isoformat(),
             'algorithm': tracker_algorithm,
             'stats': {
-                'avg_latency_ms': sum(performance_stats['latency'][-10:]) / 10 if performance_stats['latency'] else 0,
+                'avg_latency_ms': _recent_mean(performance_stats['latency']),
                 'fps': performance_stats['fps'],
-                'memory_mb': sum(performance_stats['memory'][-10:]) / 10 if performance_stats['memory'] else 0
+                'memory_mb': _recent_mean(performance_stats['memory'])
             }
         })
     
@@ -107,7 +116,3 @@ def update_performance(latency_ms, fps, memory_mb):
     performance_stats['latency'].append(latency_ms)
     performance_stats['fps'] = fps
     performance_stats['memory'].append(memory_mb)
-    
-    # 保持最近100条
-    performance_stats['latency'] = performance_stats['latency'][-100:]
-    performance_stats['memory'] = performance_stats['memory'][-100:]
@@ -9,6 +9,50 @@ from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+
+# CSV 导出的轨迹点字段及缺省值
+_CSV_POINT_FIELDS = (('timestamp', ''), ('lat', 0), ('lon', 0), ('speed_knots', 0), ('course_deg', 0))
+
+
+def _iter_csv_points(path: Path, parser=None):
+    """
+    逐个返回轨迹文件中轨迹点的 CSV 字段值元组（文件不存在或读取失败时为空）
+    
+    传入 simdjson 解析器时只取用到的字段，不把整个文档转换为 Python 字典；
+    代理对象只在本生成器内使用，遍历结束后解析器即可载入下一个文件
+    """
+    if not path.exists():
+        return
+    try:
+        if parser is not None:
+            doc = parser.load(str(path))
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                doc = json.load(f)
+        points = doc.get('trajectory', [])
+    except Exception as e:
+        print(f"读取历史失败: {e}")
+        return
+    for point in points:
+        yield tuple(point.get(key, default) for key, default in _CSV_POINT_FIELDS)
+
+
+def _json_line(obj) -> bytes:
+    """序列化为一行JSON（UTF-8，以换行结尾）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj, ensure_ascii=False) + '\n').encode('utf-8')
+
 
 class DataExporter:
     """数据导出器"""
@@ -19,7 +63,8 @@ class DataExporter:
     def export_to_json(self, target_id: str = None, 
                        start_time: str = None,
                        end_time: str = None,
-                       output_path: str = None) -> str:
+                       output_path: str = None,
+                       ndjson: bool = False) -> str:
         """
         导出为JSON格式
         
@@ -28,6 +73,8 @@ class DataExporter:
             start_time: 开始时间 (ISO格式)
             end_time: 结束时间 (ISO格式)
             output_path: 输出路径
+            ndjson: 导出所有目标时逐行写出（每行一个JSON对象，首行为导出信息，之后每行一个目标），
+                    不在内存中汇总全部轨迹
             
         Returns:
             导出文件路径
@@ -36,6 +83,9 @@ class DataExporter:
         
         player = HistoryPlayer(str(self.storage_path))
         
+        if not target_id and ndjson:
+            return self._export_ndjson(player, output_path)
+        
         if target_id:
             # 导出单个目标
             data = player.get_target_history(target_id)
@@ -67,8 +117,28 @@ class DataExporter:
             output_path = f"data/export_{timestamp}{suffix}.json"
         
         # 写入文件
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(export_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(export_data, f, ensure_ascii=False, indent=2)
+        
+        return output_path
+    
+    def _export_ndjson(self, player, output_path: str = None) -> str:
+        """逐个目标读取轨迹并写出一行JSON"""
+        if not output_path:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_path = f"data/export_{timestamp}_all.ndjson"
+        
+        with open(output_path, 'wb') as f:
+            f.write(_json_line({'exported_at': datetime.now().isoformat(), 'schema': 'ndjson-v1'}))
+            for file_path in self.storage_path.glob("*.json"):
+                tid = file_path.stem
+                data = player.get_target_history(tid)
+                if data:
+                    f.write(_json_line({'target_id': tid, 'count': len(data), 'data': data}))
         
         return output_path
     
@@ -84,40 +154,20 @@ class DataExporter:
         Returns:
             导出文件路径
         """
-        from src.history import HistoryPlayer
-        
-        player = HistoryPlayer(str(self.storage_path))
-        
-        # 收集数据
-        rows = []
+        # 同一解析器在各轨迹文件间复用
+        parser = simdjson.Parser() if simdjson is not None else None
         
         if target_id:
-            data = player.get_target_history(target_id)
-            for point in data:
-                rows.append({
-                    'target_id': target_id,
-                    'timestamp': point.get('timestamp', ''),
-                    'lat': point.get('lat', 0),
-                    'lon': point.get('lon', 0),
-                    'speed_knots': point.get('speed_knots', 0),
-                    'course_deg': point.get('course_deg', 0)
-                })
+            safe_id = target_id.replace('/', '_').replace('\\', '_')
+            sources = [(target_id, self.storage_path / f"{safe_id}.json")]
         else:
             # 所有目标
-            for file_path in self.storage_path.glob("*.json"):
-                tid = file_path.stem
-                data = player.get_target_history(tid)
-                for point in data:
-                    rows.append({
-                        'target_id': tid,
-                        'timestamp': point.get('timestamp', ''),
-                        'lat': point.get('lat', 0),
-                        'lon': point.get('lon', 0),
-                        'speed_knots': point.get('speed_knots', 0),
-                        'course_deg': point.get('course_deg', 0)
-                    })
-        
-        if not rows:
+            sources = ((file_path.stem, file_path) for file_path in self.storage_path.glob("*.json"))
+        
+        # 逐行生成、边读边写，不在内存中汇总全部轨迹点
+        rows = ((tid,) + values for tid, path in sources for values in _iter_csv_points(path, parser))
+        first = next(rows, None)
+        if first is None:
             return None
         
         # 生成文件名
@@ -127,12 +177,11 @@ class DataExporter:
             output_path = f"data/export_{timestamp}{suffix}.csv"
         
         # 写入CSV
-        if rows:
-            fieldnames = list(rows[0].keys())
-            with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(rows)
+        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['target_id'] + [key for key, _ in _CSV_POINT_FIELDS])
+            writer.writerow(first)
+            writer.writerows(rows)
         
         return output_path
     
@@ -7,14 +7,143 @@ import math
 import logging
 import sys
 import os
-from datetime import datetime
-from typing import Dict, List, Optional, Callable
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Callable, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 from src.config import Config
 from src.models import RadarTarget, AISTarget, FusedTarget
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+EARTH_RADIUS_M = 6371000
+# 海里 -> 纬度（度），按每度 111 km 近似
+NM_TO_DEG = 1852 / 111000
+
+
+_first_within = None
+
+if njit is not None:
+    @njit('i8(f8[:], f8[:], f8[:], b1[:], i8[:], f8, f8, f8)', cache=True)
+    def _first_within(lat, lon, cos_lat, excluded, slots, lat_rad, lon_rad, max_a):
+        """按 slots 顺序返回第一个未排除且半正矢 a 项小于 max_a 的槽位，没有时返回 -1（命中即停止）"""
+        cos_ref = math.cos(lat_rad)
+        for j in range(slots.shape[0]):
+            i = slots[j]
+            if excluded[i]:
+                continue
+            s_lat = math.sin((lat[i] - lat_rad) / 2)
+            s_lon = math.sin((lon[i] - lon_rad) / 2)
+            if s_lat * s_lat + cos_ref * cos_lat[i] * s_lon * s_lon < max_a:
+                return i
+        return -1
+
+
+class _GeoIndex:
+    """
+    按加入顺序保存的目标坐标（SoA 数组，弧度），一次向量运算求出与候选目标的半正矢距离
+
+    同一键再次加入时原位更新、保持原有顺序；容量不足时按倍数扩展。
+    指定 cell_m 时另按经纬度网格分桶，查询距离不超过 cell_m 时只计算邻近网格内的目标
+    """
+
+    def __init__(self, cell_m: Optional[float] = None, capacity: int = 64):
+        self.keys: List[str] = []
+        self._slots: Dict[str, int] = {}
+        self._lat = np.empty(capacity)
+        self._lon = np.empty(capacity)
+        self._cos_lat = np.empty(capacity)
+        self._excluded = np.zeros(capacity, dtype=bool)
+        # 网格边长按每度 111 km 换算（略大于按地球半径换算的值），{(纬度格, 经度格): [槽位]}
+        self._cell_m = cell_m
+        self._cell_deg = cell_m / 111000 if cell_m else None
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        self._cell_of: List[Optional[Tuple[int, int]]] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def put(self, key: str, lat: float, lon: float):
+        """加入或更新目标坐标"""
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = len(self.keys)
+            if slot == len(self._lat):
+                self._grow()
+            self._slots[key] = slot
+            self.keys.append(key)
+            self._cell_of.append(None)
+            self._excluded[slot] = False
+        if self._cell_deg:
+            cell = (math.floor(lat / self._cell_deg), math.floor(lon / self._cell_deg))
+            old = self._cell_of[slot]
+            if old != cell:
+                if old is not None:
+                    self._grid[old].remove(slot)
+                self._grid.setdefault(cell, []).append(slot)
+                self._cell_of[slot] = cell
+        lat_rad = math.radians(lat)
+        self._lat[slot] = lat_rad
+        self._lon[slot] = math.radians(lon)
+        self._cos_lat[slot] = math.cos(lat_rad)
+
+    def exclude(self, key: str):
+        """标记目标不再参与匹配"""
+        slot = self._slots.get(key)
+        if slot is not None:
+            self._excluded[slot] = True
+
+    def _grow(self):
+        size = 2 * len(self._lat)
+        for name in ('_lat', '_lon', '_cos_lat', '_excluded'):
+            old = getattr(self, name)
+            new = np.zeros(size, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _nearby_slots(self, lat: float, lon: float) -> np.ndarray:
+        """邻近网格内的槽位（升序）：纬度方向前后各一格，经度方向按纬度余弦放宽格数"""
+        cell = self._cell_deg
+        row = math.floor(lat / cell)
+        col = math.floor(lon / cell)
+        span = math.ceil(1 / math.cos(math.radians(min(abs(lat) + cell, 89.0))))
+        slots = []
+        for r in (row - 1, row, row + 1):
+            for c in range(col - span, col + span + 1):
+                slots.extend(self._grid.get((r, c), ()))
+        return np.sort(np.array(slots, dtype=np.intp))
+
+    def first_within(self, lat: float, lon: float, distance_m: float) -> Optional[str]:
+        """按加入顺序返回第一个距离小于 distance_m（米）且未排除的目标键"""
+        n = len(self.keys)
+        if n == 0:
+            return None
+        if self._cell_m is not None and distance_m <= self._cell_m:
+            slots = self._nearby_slots(lat, lon)
+            if not len(slots):
+                return None
+        else:
+            slots = np.arange(n)
+        # 距离 < d 等价于半正矢公式的 a 项 < sin²(d/2R)，无需开方和反三角
+        max_a = math.sin(distance_m / (2 * EARTH_RADIUS_M)) ** 2
+        lat_rad = math.radians(lat)
+        lon_rad = math.radians(lon)
+        if _first_within is not None:
+            slot = _first_within(self._lat, self._lon, self._cos_lat, self._excluded,
+                                 slots, lat_rad, lon_rad, max_a)
+            return self.keys[slot] if slot >= 0 else None
+        a = (np.sin((self._lat[slots] - lat_rad) / 2) ** 2 +
+             math.cos(lat_rad) * self._cos_lat[slots] * np.sin((self._lon[slots] - lon_rad) / 2) ** 2)
+        hits = slots[(a < max_a) & ~self._excluded[slots]]
+        return self.keys[hits[0]] if len(hits) else None
+
 
 class TargetFusion:
     """目标融合引擎 - 修正版"""
@@ -40,11 +169,26 @@ class TargetFusion:
         # 匹配记录
         self.matched_ais = set()  # 已匹配的AIS
 
-        # 雷达原点
+        # 坐标索引：AIS 按上报位置，雷达按换算后的地理坐标（雷达原点变化时重算）
+        self._ais_index = _GeoIndex(self.association_distance)
+        self._radar_index = _GeoIndex(self.association_distance)
+        # 雷达目标换算后的地理坐标 {目标ID: (纬度, 经度)}
+        self._radar_geo: Dict[str, Tuple[float, float]] = {}
+
+        # 融合目标更新时间（epoch 秒），与 _fused_ids 按槽位对应，过期清理时一次比较
+        self._fused_ids: List[str] = []
+        self._fused_slots: Dict[str, int] = {}
+        self._fused_ts = np.empty(64)
+
+        # 雷达原点及其纬度余弦（换算经度用，原点变化时更新）
         self.radar_origin = (0.0, 0.0)
+        self._cos_ref_lat = 1.0
 
     def set_radar_origin(self, lon: float, lat: float):
         self.radar_origin = (lon, lat)
+        self._cos_ref_lat = math.cos(math.radians(lat))
+        for target in self.radar_targets.values():
+            self._set_radar_geo(target)
         self.logger.info(f"雷达原点: ({lon}, {lat})")
 
     def add_radar_target(self, target: RadarTarget):
@@ -55,21 +199,16 @@ class TargetFusion:
     def add_ais_target(self, target: AISTarget):
         """添加AIS目标"""
         self.ais_targets[target.mmsi] = target
+        self._ais_index.put(target.mmsi, target.lat, target.lon)
 
         # 先尝试与现有雷达目标匹配
         matched_radar = self._find_matching_radar(target.lat, target.lon)
 
         if matched_radar:
             # 有匹配的雷达目标，创建融合目标
-            self.matched_ais.add(target.mmsi)
-
-            # 转换雷达位置到地理坐标
-            lat, lon = self._radar_to_geo(
-                matched_radar.distance_nm,
-                matched_radar.bearing_deg,
-                self.radar_origin[1],
-                self.radar_origin[0]
-            )
+            self._mark_matched(target.mmsi)
+
+            lat, lon = self._radar_geo[matched_radar.target_id]
 
             fused_id = f"F{target.mmsi}"
 
@@ -84,7 +223,7 @@ class TargetFusion:
                 course_deg=target.course_deg or matched_radar.course_deg,
                 confidence=0.9
             )
-            self.fused_targets[fused_id] = fused
+            self._store_fused(fused)
 
             if self.callback:
                 self.callback(fused)
@@ -98,19 +237,14 @@ class TargetFusion:
         核心逻辑：雷达检测到所有船舶，尝试找匹配的AIS
         """
         # 转换雷达位置到地理坐标
-        lat, lon = self._radar_to_geo(
-            radar_target.distance_nm,
-            radar_target.bearing_deg,
-            self.radar_origin[1],
-            self.radar_origin[0]
-        )
+        lat, lon = self._set_radar_geo(radar_target)
 
         # 查找匹配的AIS（在范围内）
         matched_ais = self._find_matching_ais(lat, lon)
 
         if matched_ais:
             # 融合目标：雷达+AIS双重确认
-            self.matched_ais.add(matched_ais.mmsi)
+            self._mark_matched(matched_ais.mmsi)
             fused_id = f"F{matched_ais.mmsi}"  # 用MMSI作为ID
 
             fused = FusedTarget(
@@ -139,7 +273,7 @@ class TargetFusion:
                 confidence=0.7
             )
 
-        self.fused_targets[fused_id] = fused
+        self._store_fused(fused)
 
         if self.callback:
             self.callback(fused)
@@ -175,57 +309,53 @@ class TargetFusion:
                 confidence=0.8
             )
 
-            self.fused_targets[fused_id] = fused
+            self._store_fused(fused)
 
             if self.callback:
                 self.callback(fused)
 
             self.logger.debug(f"AIS目标: {ais_target.mmsi} -> {fused_id} (仅AIS)")
 
+    def _mark_matched(self, mmsi: str):
+        """记录已匹配的AIS，之后不再参与匹配"""
+        self.matched_ais.add(mmsi)
+        self._ais_index.exclude(mmsi)
+
     def _find_matching_ais(self, lat: float,
                            lon: float) -> Optional[AISTarget]:
-        """查找匹配的AIS目标"""
-        for ais in self.ais_targets.values():
-            if ais.mmsi in self.matched_ais:
-                continue  # 已匹配
-            distance = self._haversine_distance(lat, lon, ais.lat, ais.lon)
-            if distance < self.association_distance:
-                return ais
-        return None
+        """查找匹配的AIS目标（未匹配、距离在关联范围内的第一个）"""
+        mmsi = self._ais_index.first_within(lat, lon, self.association_distance)
+        return self.ais_targets[mmsi] if mmsi is not None else None
 
     def _find_matching_radar(self, lat: float,
                              lon: float) -> Optional[RadarTarget]:
-        """查找匹配的雷达目标"""
-        for radar in self.radar_targets.values():
-            r_lat, r_lon = self._radar_to_geo(
-                radar.distance_nm,
-                radar.bearing_deg,
-                self.radar_origin[1],
-                self.radar_origin[0]
-            )
-            distance = self._haversine_distance(lat, lon, r_lat, r_lon)
-            if distance < self.association_distance:
-                return radar
-        return None
+        """查找匹配的雷达目标（距离在关联范围内的第一个）"""
+        target_id = self._radar_index.first_within(lat, lon, self.association_distance)
+        return self.radar_targets[target_id] if target_id is not None else None
+
+    def _set_radar_geo(self, radar_target: RadarTarget) -> Tuple[float, float]:
+        """换算并记录雷达目标的地理坐标（加入目标或雷达原点变化时调用）"""
+        geo = self._radar_to_geo(radar_target.distance_nm, radar_target.bearing_deg)
+        self._radar_geo[radar_target.target_id] = geo
+        self._radar_index.put(radar_target.target_id, *geo)
+        return geo
 
-    def _radar_to_geo(self, distance_nm: float, bearing_deg: float,
-                      ref_lat: float, ref_lon: float) -> tuple:
-        """雷达极坐标 -> 地理坐标"""
-        distance_m = distance_nm * 1852
-        distance_deg = distance_m / 111000
+    def _radar_to_geo(self, distance_nm: float, bearing_deg: float) -> tuple:
+        """雷达极坐标（相对雷达原点） -> 地理坐标"""
+        distance_deg = distance_nm * NM_TO_DEG
 
         bearing_rad = math.radians(bearing_deg)
 
+        ref_lon, ref_lat = self.radar_origin
         lat = ref_lat + distance_deg * math.cos(bearing_rad)
-        lon = ref_lon + distance_deg * \
-            math.sin(bearing_rad) / math.cos(math.radians(ref_lat))
+        lon = ref_lon + distance_deg * math.sin(bearing_rad) / self._cos_ref_lat
 
         return (lat, lon)
 
     def _haversine_distance(self, lat1: float, lon1: float,
                             lat2: float, lon2: float) -> float:
         """Haversine距离（米）"""
-        R = 6371000
+        R = EARTH_RADIUS_M
         lat1_rad = math.radians(lat1)
         lat2_rad = math.radians(lat2)
         delta_lat = math.radians(lat2 - lat1)
@@ -237,16 +367,29 @@ class TargetFusion:
 
         return R * c
 
+    def _store_fused(self, fused: FusedTarget):
+        """保存融合目标并记录其更新时间"""
+        self.fused_targets[fused.fused_id] = fused
+        slot = self._fused_slots.get(fused.fused_id)
+        if slot is None:
+            slot = len(self._fused_ids)
+            if slot == len(self._fused_ts):
+                self._fused_ts = np.concatenate([self._fused_ts, np.empty(slot)])
+            self._fused_slots[fused.fused_id] = slot
+            self._fused_ids.append(fused.fused_id)
+        self._fused_ts[slot] = fused.timestamp.timestamp()
+
     def get_fused_targets(self) -> List[FusedTarget]:
         """获取所有融合目标"""
-        # 清理过期目标
-        now = datetime.now()
-        expired = []
-        for fid, target in self.fused_targets.items():
-            if (now - target.timestamp).total_seconds() > self.max_age:
-                expired.append(fid)
-        for fid in expired:
-            del self.fused_targets[fid]
+        # 清理过期目标：一次比较找出超时槽位，删除后压缩数组
+        n = len(self._fused_ids)
+        live = self._fused_ts[:n] >= time.time() - self.max_age
+        if not live.all():
+            for i in np.flatnonzero(~live):
+                del self.fused_targets[self._fused_ids[i]]
+            self._fused_ids = [fid for fid, keep in zip(self._fused_ids, live) if keep]
+            self._fused_slots = {fid: slot for slot, fid in enumerate(self._fused_ids)}
+            self._fused_ts[:len(self._fused_ids)] = self._fused_ts[:n][live]
 
         return list(self.fused_targets.values())
 
@@ -254,17 +397,16 @@ class TargetFusion:
         """获取统计"""
         fused = self.get_fused_targets()
 
-        radar_only = sum(1 for t in fused if t.source_type == 'radar')
-        ais_only = sum(1 for t in fused if t.source_type == 'ais')
-        fused_count = sum(1 for t in fused if t.source_type == 'fused')
+        # 一次遍历按来源计数
+        counts = Counter(t.source_type for t in fused)
 
         return {
             'radar_targets': len(self.radar_targets),
             'ais_targets': len(self.ais_targets),
             'fused_targets': len(fused),
-            'radar_only': radar_only,
-            'ais_only': ais_only,
-            'fused_count': fused_count
+            'radar_only': counts['radar'],
+            'ais_only': counts['ais'],
+            'fused_count': counts['fused']
         }
 
 
@@ -281,6 +423,8 @@ class FusionEngine:
         self.radar_targets = {}
         self.ais_targets = {}
         self.fused_targets = {}
+        # 数据版本号：每次加入目标后递增，供快照缓存判断数据是否变化
+        self.version = 0
 
     def _on_fused(self, target: FusedTarget):
         self.fused_targets[target.fused_id] = target
@@ -290,10 +434,12 @@ class FusionEngine:
     def add_radar_target(self, target: RadarTarget):
         self.radar_targets[target.target_id] = target
         self.fusion.add_radar_target(target)
+        self.version += 1
 
     def add_ais_target(self, target: AISTarget):
         self.ais_targets[target.mmsi] = target
         self.fusion.add_ais_target(target)
+        self.version += 1
 
     def register_callback(self, callback: Callable):
         self.callbacks.append(callback)
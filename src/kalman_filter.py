@@ -5,9 +5,18 @@ Kalman滤波模块
 # pylint: disable=duplicate-code
 """
 
+import time
+from collections import OrderedDict
+
 import numpy as np
 from typing import Optional, Tuple
 
+# 常用单位阵（只读，使用时通过乘法或 copy() 产生新数组）
+_I4 = np.eye(4)
+_I2 = np.eye(2)
+_I4.setflags(write=False)
+_I2.setflags(write=False)
+
 
 class KalmanFilter:
     """
@@ -32,7 +41,7 @@ class KalmanFilter:
         # 状态向量：[x, y, vx, vy]
         self.state = np.zeros((4, 1))
         # 状态协方差矩阵
-        self.P = np.eye(4) * 100
+        self.P = _I4 * 100
         # 状态转移矩阵
         self.F = np.array([
             [1, 0, dt, 0],
@@ -46,9 +55,9 @@ class KalmanFilter:
             [0, 1, 0, 0]
         ])
         # 过程噪声协方差矩阵
-        self.Q = np.eye(4) * process_noise
+        self.Q = _I4 * process_noise
         # 测量噪声协方差矩阵
-        self.R = np.eye(2) * measurement_noise
+        self.R = _I2 * measurement_noise
 
         self.initialized = False
 
@@ -58,7 +67,7 @@ class KalmanFilter:
         self.state[1, 0] = y
         self.state[2, 0] = 0  # vx
         self.state[3, 0] = 0  # vy
-        self.P = np.eye(4) * 1
+        self.P = _I4.copy()
         self.initialized = True
 
     def predict(self) -> Tuple[float, float]:
@@ -106,7 +115,7 @@ class KalmanFilter:
 
         # 状态更新
         self.state = self.state + K @ y
-        self.P = (np.eye(4) - K @ self.H) @ self.P
+        self.P = (_I4 - K @ self.H) @ self.P
 
         return self.state[0, 0], self.state[1, 0]
 
@@ -140,47 +149,213 @@ class KalmanFilter:
 
 
 class MultiTargetKalmanFilter:
-    """多目标 Kalman 滤波器"""
+    """
+    多目标 Kalman 滤波器
+
+    所有目标的状态按 SoA 方式存放：X 为 (N, 4)，P 为 (N, 4, 4)，
+    通过 id_to_idx 映射到行号。queue_measurement() 缓存本周期的测量，
+    flush() 一次性对所有待更新目标做向量化的预测+更新。
+
+    新目标在 confirm_window 秒内出现 min_hits 次后才分配滤波器，
+    只出现一次的虚警不占用状态存储。
+    """
 
-    def __init__(self):
-        self.filters = {}
+    _INITIAL_CAPACITY = 16
+
+    def __init__(self, dt: float = 1.0, min_hits: int = 2,
+                 confirm_window: float = 10.0):
+        self.dt = dt
+        self.min_hits = min_hits
+        self.confirm_window = confirm_window
+        self.F = np.array([
+            [1, 0, dt, 0],
+            [0, 1, 0, dt],
+            [0, 0, 1, 0],
+            [0, 0, 0, 1]
+        ], dtype=np.float64)
+
+        capacity = self._INITIAL_CAPACITY
+        self.X = np.zeros((capacity, 4))
+        self.P = np.zeros((capacity, 4, 4))
+        self.q = np.zeros(capacity)  # 每个目标的过程噪声
+        self.r = np.zeros(capacity)  # 每个目标的测量噪声
+        self.size = 0
+
+        self.id_to_idx = {}
+        self.idx_to_id = []
+        # 待更新测量: 行号 -> (x, y)
+        self.pending = {}
+        # 未确认目标: target_id -> [x, y, 首次出现时间, 出现次数]，按首次出现时间排序
+        self.tentative = OrderedDict()
+
+    def __contains__(self, target_id):
+        return target_id in self.id_to_idx
+
+    def _grow(self):
+        """容量翻倍"""
+        capacity = self.X.shape[0] * 2
+        for name in ('X', 'P', 'q', 'r'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:])
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
 
     def add_target(self, target_id: str, x: float, y: float,
                    process_noise: float = 0.1, measurement_noise: float = 1.0):
         """添加目标"""
-        kf = KalmanFilter(
-            process_noise=process_noise,
-            measurement_noise=measurement_noise
-        )
-        kf.initialize(x, y)
-        self.filters[target_id] = kf
+        if target_id in self.id_to_idx:
+            self.remove_target(target_id)
+        if self.size == self.X.shape[0]:
+            self._grow()
+
+        idx = self.size
+        self.X[idx] = (x, y, 0.0, 0.0)
+        self.P[idx] = _I4
+        self.q[idx] = process_noise
+        self.r[idx] = measurement_noise
+        self.id_to_idx[target_id] = idx
+        self.idx_to_id.append(target_id)
+        self.size += 1
+
+    def queue_measurement(self, target_id: str, x: float, y: float):
+        """
+        缓存一次测量，等待 flush() 批量更新
 
-    def update_target(self, target_id: str, x: float, y: float) -> Optional[dict]:
-        """更新目标状态"""
-        if target_id not in self.filters:
-            self.add_target(target_id, x, y)
-            return self.filters[target_id].get_state()
+        新目标确认后用上一次出现的位置初始化，本次测量作为第一次更新；
+        同一目标在一个周期内收到第二次测量时，先 flush 掉之前缓存的测量，
+        保证按时间顺序处理。
+        """
+        idx = self.id_to_idx.get(target_id)
+        if idx is None:
+            entry = self._register_hit(target_id, x, y)
+            if entry is None:
+                return
+            self.add_target(target_id, entry[0], entry[1])
+            if entry[3] == 1:
+                return
+            idx = self.id_to_idx[target_id]
+        elif idx in self.pending:
+            self.flush()
+        self.pending[idx] = (x, y)
+
+    def _register_hit(self, target_id: str, x: float, y: float) -> Optional[list]:
+        """记录未确认目标的一次出现，达到 min_hits 时返回其记录"""
+        now = time.monotonic()
+        while self.tentative:
+            oldest = next(iter(self.tentative.values()))
+            if now - oldest[2] <= self.confirm_window:
+                break
+            self.tentative.popitem(last=False)
+
+        entry = self.tentative.get(target_id)
+        if entry is None:
+            entry = self.tentative[target_id] = [x, y, now, 0]
+        entry[3] += 1
+        if entry[3] < self.min_hits:
+            entry[0], entry[1] = x, y
+            return None
+        del self.tentative[target_id]
+        return entry
+
+    def flush(self):
+        """对所有待更新目标执行一次批量预测+更新"""
+        if not self.pending:
+            return
+
+        idx = np.fromiter(self.pending.keys(), dtype=np.intp,
+                          count=len(self.pending))
+        z = np.array(list(self.pending.values()), dtype=np.float64)
+        self.pending.clear()
+
+        X = self.X[idx]
+        P = self.P[idx]
+        q = self.q[idx]
+        r = self.r[idx]
+        F = self.F
+
+        # 预测: X = X F^T，P = F P F^T + Q
+        X = X @ F.T
+        P = np.einsum('ij,njk,lk->nil', F, P, F)
+        P[:, range(4), range(4)] += q[:, None]
+
+        # 更新: H 取前两维，S = P[:2, :2] + R，2x2 闭式求逆
+        y = z - X[:, :2]
+        s00 = P[:, 0, 0] + r
+        s01 = P[:, 0, 1]
+        s11 = P[:, 1, 1] + r
+        det = s00 * s11 - s01 * s01
+        S_inv = np.empty((len(idx), 2, 2))
+        S_inv[:, 0, 0] = s11 / det
+        S_inv[:, 0, 1] = S_inv[:, 1, 0] = -s01 / det
+        S_inv[:, 1, 1] = s00 / det
+
+        K = np.einsum('nij,njk->nik', P[:, :, :2], S_inv)
+        X += np.einsum('nij,nj->ni', K, y)
+
+        # Joseph 形式: P = (I - K H) P (I - K H)^T + K R K^T
+        A = np.broadcast_to(_I4, P.shape).copy()
+        A[:, :, :2] -= K
+        P = np.einsum('nij,njk,nlk->nil', A, P, A)
+        P += np.einsum('nij,nkj->nik', K, K) * r[:, None, None]
+
+        self.X[idx] = X
+        self.P[idx] = P
 
-        kf = self.filters[target_id]
-        kf.predict_update(x, y)
-        return kf.get_state()
+    def update_target(self, target_id: str, x: float, y: float) -> Optional[dict]:
+        """更新单个目标状态（立即生效，返回更新后的状态；未确认目标返回None）"""
+        self.queue_measurement(target_id, x, y)
+        self.flush()
+        return self.get_state(target_id)
 
     def predict_target(self, target_id: str) -> Optional[tuple]:
         """预测目标位置"""
-        if target_id not in self.filters:
+        idx = self.id_to_idx.get(target_id)
+        if idx is None:
             return None
-        return self.filters[target_id].predict()
+        self.X[idx] = self.F @ self.X[idx]
+        self.P[idx] = self.F @ self.P[idx] @ self.F.T + _I4 * self.q[idx]
+        return self.X[idx, 0], self.X[idx, 1]
 
     def remove_target(self, target_id: str):
-        """移除目标"""
-        if target_id in self.filters:
-            del self.filters[target_id]
+        """移除目标（末行移入空位，保持数组紧凑）"""
+        self.tentative.pop(target_id, None)
+        idx = self.id_to_idx.pop(target_id, None)
+        if idx is None:
+            return
+        self.pending.pop(idx, None)
+
+        last = self.size - 1
+        if idx != last:
+            for arr in (self.X, self.P, self.q, self.r):
+                arr[idx] = arr[last]
+            moved_id = self.idx_to_id[last]
+            self.idx_to_id[idx] = moved_id
+            self.id_to_idx[moved_id] = idx
+            if last in self.pending:
+                self.pending[idx] = self.pending.pop(last)
+        self.idx_to_id.pop()
+        self.size -= 1
+
+    def get_state(self, target_id: str) -> Optional[dict]:
+        """获取单个目标状态"""
+        idx = self.id_to_idx.get(target_id)
+        if idx is None:
+            return None
+        vx, vy = self.X[idx, 2], self.X[idx, 3]
+        return {
+            'x': float(self.X[idx, 0]),
+            'y': float(self.X[idx, 1]),
+            'vx': float(vx),
+            'vy': float(vy),
+            'speed': float(np.sqrt(vx**2 + vy**2)),
+            'P': self.P[idx].tolist()
+        }
 
     def get_all_states(self) -> dict:
         """获取所有目标状态"""
         return {
-            tid: kf.get_state()
-            for tid, kf in self.filters.items()
+            tid: self.get_state(tid)
+            for tid in self.idx_to_id
         }
 
 
@@ -257,3 +257,71 @@ class TargetUpdate:
             'data': self.data,
             'timestamp': self.timestamp.isoformat()
         }
+
+
+@dataclass(slots=True)
+class TrackedTarget:
+    """
+    目标处理记录
+
+    主程序目标更新回调中使用的定长结构，字段固定，避免直接修改
+    FusedTarget.__dict__。提供 get() 以兼容按字典读取的分类/告警规则，
+    值为 None 的字段视为不存在。
+    """
+    id: str = ''
+    lat: float = 0.0
+    lon: float = 0.0
+    speed_knots: float = 0.0
+    course_deg: float = 0.0
+    timestamp: str = ''
+    source_type: str = ''
+    mmsi: str = ''
+    ship_type: str = ''
+    distance_nm: Optional[float] = None
+    kalman_lat: Optional[float] = None
+    kalman_lon: Optional[float] = None
+    predict_lat: Optional[float] = None
+    predict_lon: Optional[float] = None
+    classification: Optional[dict] = None
+    clutter_passed: bool = False
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    @classmethod
+    def from_target(cls, target) -> Optional['TrackedTarget']:
+        """从 FusedTarget 或目标字典转换，无法识别时返回 None"""
+        if isinstance(target, FusedTarget):
+            radar, ais = target.radar_target, target.ais_target
+            return cls(
+                id=target.fused_id,
+                lat=target.lat,
+                lon=target.lon,
+                speed_knots=target.speed_knots,
+                course_deg=target.course_deg,
+                timestamp=target.timestamp.isoformat(),
+                source_type=target.source_type,
+                mmsi=ais.mmsi if ais else '',
+                ship_type=ais.ship_type if ais else '',
+                distance_nm=radar.distance_nm if radar else None
+            )
+
+        if not isinstance(target, dict) or not target:
+            return None
+
+        timestamp = target.get('timestamp') or datetime.now()
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.isoformat()
+        return cls(
+            id=target.get('id', ''),
+            lat=target.get('lat', 0),
+            lon=target.get('lon', 0),
+            speed_knots=target.get('speed_knots', 0),
+            course_deg=target.get('course_deg', 0),
+            timestamp=timestamp,
+            source_type=target.get('source_type', ''),
+            mmsi=target.get('mmsi', ''),
+            ship_type=target.get('ship_type', ''),
+            distance_nm=target.get('distance_nm')
+        )
@@ -6,7 +6,7 @@
 import json
 from pathlib import Path
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterable, List, Optional, Tuple
 
 
 class TrajectoryStorage:
@@ -23,6 +23,32 @@ class TrajectoryStorage:
     
     def save_trajectory(self, target_id: str, trajectory_data: dict) -> bool:
         """保存轨迹到JSON文件"""
+        return self._append_points(target_id, [trajectory_data])
+    
+    def save_trajectory_batch(self, entries: Iterable[Tuple[str, dict]]) -> int:
+        """
+        批量保存轨迹
+        
+        同一目标的多个轨迹点合并为一次文件读写。
+        
+        Args:
+            entries: (target_id, trajectory_data) 序列
+            
+        Returns:
+            成功写入的目标数
+        """
+        grouped = {}
+        for target_id, trajectory_data in entries:
+            grouped.setdefault(target_id, []).append(trajectory_data)
+        
+        saved = 0
+        for target_id, points in grouped.items():
+            if self._append_points(target_id, points):
+                saved += 1
+        return saved
+    
+    def _append_points(self, target_id: str, points: List[dict]) -> bool:
+        """追加轨迹点到目标的JSON文件"""
         try:
             file_path = self._get_file_path(target_id)
             
@@ -37,7 +63,7 @@ class TrajectoryStorage:
                 }
             
             data['updated_at'] = datetime.now().isoformat()
-            data['trajectory'].append(trajectory_data)
+            data['trajectory'].extend(points)
             
             if len(data['trajectory']) > 1000:
                 data['trajectory'] = data['trajectory'][-1000:]
@@ -12,9 +12,10 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.advanced_tracker import KFTracker, TrackerFactory
+from src.kalman_filter import KalmanFilter, MultiTargetKalmanFilter
 from src.fusion import FusionEngine
 from src.config import Config
-from src.alert import AlertManager
+from src.alert import AlertManager, TargetBatch
 from src.classifier import TargetClassifier
 
 
@@ -57,6 +58,47 @@ class TestKFTracker:
         assert 'speed' in state
 
 
+class TestMultiTargetKalmanFilter:
+    """测试多目标批量卡尔曼滤波"""
+
+    def test_batch_matches_single(self):
+        mkf = MultiTargetKalmanFilter()
+        singles = {}
+        for tid, (x, y) in {'a': (0.0, 0.0), 'b': (100.0, 50.0)}.items():
+            mkf.queue_measurement(tid, x, y)
+            singles[tid] = KalmanFilter()
+            singles[tid].initialize(x, y)
+
+        for i in range(1, 10):
+            for tid, offset in (('a', 0.0), ('b', 100.0)):
+                mx = offset + 1.5 * i + np.random.randn() * 0.3
+                my = offset / 2 + 0.5 * i + np.random.randn() * 0.3
+                mkf.queue_measurement(tid, mx, my)
+                singles[tid].predict_update(mx, my)
+            mkf.flush()
+
+        for tid, kf in singles.items():
+            state = mkf.get_state(tid)
+            assert state['x'] == pytest.approx(kf.get_state()['x'])
+            assert state['y'] == pytest.approx(kf.get_state()['y'])
+            assert np.allclose(state['P'], kf.P)
+
+    def test_remove_target(self):
+        mkf = MultiTargetKalmanFilter(min_hits=1)
+        for i in range(20):
+            mkf.update_target(f't{i}', float(i), float(i))
+        mkf.remove_target('t0')
+        assert 't0' not in mkf
+        assert mkf.get_state('t19')['x'] == pytest.approx(19.0)
+
+    def test_single_hit_not_tracked(self):
+        mkf = MultiTargetKalmanFilter(min_hits=2)
+        assert mkf.update_target('t1', 1.0, 1.0) is None
+        assert 't1' not in mkf
+        assert mkf.update_target('t1', 1.1, 1.1) is not None
+        assert 't1' in mkf
+
+
 class TestTrackerFactory:
     """测试跟踪器工厂"""
 
@@ -116,6 +158,63 @@ class TestAlertManager:
         # 正常速度不应该触发告警
         assert len(alerts) == 0
 
+    def test_check_targets_matches_single(self):
+        targets = [
+            {'id': '1', 'speed_knots': 35, 'distance_nm': 1.0, 'source_type': 'radar', 'course_deg': 45},
+            {'id': '2', 'speed_knots': 0.3, 'distance_nm': 0.2, 'source_type': 'radar', 'course_deg': 300},
+            {'id': '3', 'speed_knots': None, 'distance_nm': 12, 'source_type': 'ais'},
+            {'id': '4'},
+        ]
+        single = [a['id'] for t in targets for a in AlertManager().check_target(t)]
+        batch = [a['id'] for a in AlertManager().check_targets(targets)]
+        assert batch == single
+
+    def test_check_targets_string_field(self):
+        # 字符串数值在逐条路径中比较失败，批量路径同样不应触发
+        target = {'id': 'x', 'speed_knots': '35', 'source_type': 'radar'}
+        assert AlertManager().check_targets([target]) == []
+        assert AlertManager().check_target(target) == []
+
+    def test_check_target_batch(self):
+        targets = [
+            {'id': '1', 'speed_knots': 35, 'distance_nm': 1.0, 'source_type': 'radar'},
+            {'id': '2', 'speed_knots': 10, 'distance_nm': 0.2, 'source_type': 'ais'},
+        ]
+        batch = TargetBatch.from_dicts(targets)
+        batch.targets = None  # 仅保留列数据
+        alerts = AlertManager().check_targets(batch)
+        assert [a['id'] for a in alerts] == [a['id'] for a in AlertManager().check_targets(targets)]
+        assert alerts[0]['target']['speed_knots'] == 35
+
+    def test_heading_port(self):
+        manager = AlertManager()
+        rules = lambda course: {a['rule'] for a in manager.check_target(
+            {'id': 't1', 'speed_knots': 10, 'distance_nm': 1.0, 'course_deg': course})}
+        assert 'heading_port' in rules(300)
+        assert 'heading_port' in rules(45)
+        assert 'heading_port' not in rules(180)
+
+
+class TestAISConnection:
+    """测试AIS语句处理"""
+
+    def test_skipped_multipart_does_not_corrupt_static(self):
+        pytest.importorskip('pyais.queue')
+        import logging
+        from src.ais_parser import AISConnection
+        lines = [
+            # 类型8二进制广播（两段），不需要解码
+            b'!AIVDM,2,1,3,A,8wwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwwww,0*59',
+            b'!AIVDM,2,2,3,A,ZZZZZZZZZZZZZZZZZZZZ,0*15',
+            # 同一序列号、信道的类型5静态数据
+            b'!AIVDO,2,1,3,A,569?UCP000009QU`001`PuE<P4s4000000000000000000000012CQj0BH43,0*52',
+            b'!AIVDO,2,2,3,A,lU80@Pi1AQh,2*14',
+        ]
+        connection = AISConnection({}, logging.getLogger('test'))
+        for line in lines:
+            connection._process_line(line, lambda target: None)
+        assert connection._static['412345678']['dest'] == 'DINGHAI PORT ABCDEFG'
+
 
 class TestClassifier:
     """测试目标分类"""
@@ -137,6 +236,88 @@ class TestClassifier:
         assert 'region' in result
 
 
+class TestCFARDetector:
+    """测试CFAR检测与杂波过滤"""
+
+    def test_detect_spike(self):
+        from src.cfar_filter import CFARDetector
+        cfar = CFARDetector(guard_cells=2, ref_cells=16)
+        signal = np.full(100, 0.1)
+        signal[50] = 5.0
+        results = cfar.detect(signal)
+        assert list(np.where(results == 1)[0]) == [50]
+
+    def test_short_signal(self):
+        from src.cfar_filter import CFARDetector
+        assert not CFARDetector(guard_cells=2, ref_cells=16).detect(np.ones(30)).any()
+
+    def test_clutter_filter(self):
+        from src.cfar_filter import ClutterFilter
+        clutter = ClutterFilter(min_speed=1.0, max_speed=30.0, min_distance=0.1, max_distance=10.0)
+        targets = [
+            {'id': '1', 'speed_knots': 0.3, 'distance_nm': 1.0},
+            {'id': '2', 'speed_knots': 10.0, 'distance_nm': 1.0},
+            {'id': '3', 'speed_knots': 15.0, 'distance_nm': 0.02},
+            {'id': '4', 'speed_knots': 20.0, 'distance_nm': 5.0},
+        ]
+        assert [t['id'] for t in clutter.filter_targets(targets)] == ['2', '4']
+        assert clutter.filter_targets([]) == []
+
+
+class TestRadarAPI:
+    """测试Web API"""
+
+    def test_page_gzip(self):
+        import gzip
+        from src.api import RadarAPI
+        client = RadarAPI(Config(), FusionEngine(Config())).app.test_client()
+        plain = client.get('/settings')
+        packed = client.get('/settings', headers={'Accept-Encoding': 'gzip'})
+        assert packed.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(packed.data) == plain.data
+
+    def test_rejoin_gets_broadcast_baseline(self):
+        import json
+        from src.api import RadarAPI
+        api = RadarAPI(Config(), FusionEngine(Config()))
+        api._make_delta({'fused': [{'id': 'F1', 'lat': 30.0, 'lon': 122.0}]})
+        client = api.socketio.test_client(api.app)
+        client.emit('subscribe_target', {'id': 'F1'})
+        api._make_delta({'fused': []})  # 订阅期间 F1 消失，全量房间的删除增量不会送达
+        client.get_received()
+        client.emit('unsubscribe_target', {'id': 'F1'})
+        received = client.get_received()
+        assert [m['name'] for m in received] == ['target_update']
+        assert json.loads(received[0]['args'][0])['fused'] == []
+        client.emit('subscribe_target', {})
+        assert client.get_received()[0]['name'] == 'subscribe_error'
+
+    def test_stream_zip64(self, tmp_path, monkeypatch):
+        import io
+        import zipfile
+        from src.api import _stream_zip
+        log = tmp_path / 'radar.log'
+        log.write_bytes(os.urandom(5000))
+        monkeypatch.setattr(zipfile, 'ZIP64_LIMIT', 1000)  # 以小文件模拟超过2GiB的日志
+        data = b''.join(_stream_zip([(str(log), 'radar.log')], {'system_info.txt': 'x'}))
+        monkeypatch.undo()
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            # 本地文件头扩展字段以 zip64 标识 0x0001 开头
+            offset = zf.getinfo('radar.log').header_offset
+            name_len = int.from_bytes(data[offset + 26:offset + 28], 'little')
+            assert data[offset + 30 + name_len:offset + 32 + name_len] == b'\x01\x00'
+            assert zf.read('radar.log') == log.read_bytes()
+
+    def test_coerce_form(self):
+        from src.api import coerce_form
+        data = coerce_form({'radar_port': '2000', 'origin_lat': '30.017', 'ais_enabled': 'true', 'radar_ip': '1.2.3.4'})
+        assert data == {'radar_port': 2000, 'origin_lat': 30.017, 'ais_enabled': True, 'radar_ip': '1.2.3.4'}
+        with pytest.raises(ValueError):
+            coerce_form({'radar_port': 'abc'})
+        with pytest.raises(TypeError):
+            coerce_form([1, 2])
+
+
 class TestConfig:
     """测试配置"""
 
@@ -150,6 +331,13 @@ class TestConfig:
         radar = config.get('radar')
         assert radar is not None
 
+    def test_set_does_not_leak(self):
+        config = Config()
+        config.set('output.websocket.msgpack', True)
+        assert config.get('output.websocket.msgpack') is True
+        assert config.output_config['websocket']['msgpack'] is True
+        assert Config().get('output.websocket.msgpack') is False
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])